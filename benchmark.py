@@ -0,0 +1,352 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from aiohttp import web
+from scraper import ScraperClass
+import blob
+from instrumentation import configureLogging
+
+logger = logging.getLogger(__name__)
+
+# number of pages of the synthetic site
+sitePages = 200
+# links per page
+fanout = 8
+# number of hosts the pages are spread over (127.0.0.1, 127.0.0.2, ...; loopback addresses beyond .1 need Linux)
+siteHosts = 4
+# first port of the site
+sitePort = 8790
+# mean response latency in seconds, each response is delayed by 50-150% of it
+latency = 0.05
+# share of pages showing a cookie consent banner
+consentShare = 0.3
+# share of links pointing to PDF & binary downloads
+pdfShare = 0.05
+binaryShare = 0.03
+# size of binary downloads in bytes
+binarySize = 256 * 1024
+# share of pages duplicating the text of an earlier page
+duplicateShare = 0.1
+# seed of the random site generator, same seed gives the same site
+siteSeed = 42
+# scraper settings (limits are set high enough to crawl the whole site)
+tierLimit = 10
+outputFormat = 'pdf'
+httpFastPath = True
+blockResources = True
+dedup = True
+# run the browser without window, a visible browser skews timings
+headless = True
+# upload output to Azurite (local Azure Storage emulator) & measure upload throughput
+uploadBenchmark = True
+# directory for benchmark results (JSON per run) & scraped output
+resultsDir = Path('./benchmarks')
+
+# minimal PDF with one page of text, xref offsets computed from the objects
+def makePDF(text: str):
+    stream = f"BT /F1 18 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+               b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+# stylesheet & image shared by all pages (~20 KB & ~50 KB)
+STYLESHEET = ''.join(f".rule{i} {{ margin: {i % 17}px; padding: {i % 13}px; color: #{i % 4096:03x}; }}\n" for i in range(400))
+LOGO = b'\x89PNG\r\n\x1a\n' + random.Random(0).randbytes(50 * 1024)
+
+class SyntheticSiteClass:
+    # initialize generated site; the link graph & page features are derived from the seed only
+    def __init__(self, pages: int, fanout: int, hosts: int, port: int, latency: float, consentShare: float, pdfShare: float,
+                 binaryShare: float, binarySize: int, duplicateShare: float, seed: int):
+        self.PAGES = pages
+        self.HOSTS = hosts
+        self.PORT = port
+        self.LATENCY = latency
+        self.BINARYSIZE = binarySize
+        rng = random.Random(seed)
+        # vocabulary for page texts, long enough for SimHash
+        vocabulary = [f"word{i}" for i in range(2000)]
+        self.pages = []
+        for i in range(pages):
+            # chain link keeps every page reachable from the root, the rest are random
+            links = [self.pageURL(i + 1)] if i + 1 < pages else []
+            for _ in range(fanout - len(links)):
+                draw = rng.random()
+                if draw < pdfShare:
+                    links.append(self.fileURL(rng.randrange(pages), 'pdf'))
+                elif draw < pdfShare + binaryShare:
+                    links.append(self.fileURL(rng.randrange(pages), 'bin'))
+                else:
+                    links.append(self.pageURL(rng.randrange(pages)))
+            # duplicate pages repeat the text of an earlier page under another URL
+            if i > 0 and rng.random() < duplicateShare:
+                text = self.pages[rng.randrange(i)]['TEXT']
+            else:
+                text = ' '.join(rng.choice(vocabulary) for _ in range(300))
+            self.pages.append({'TITLE': f"Page {i}", 'TEXT': text, 'LINKS': links, 'CONSENT': rng.random() < consentShare})
+        self.rng = rng
+        self.runner = None
+
+    # function getting the host address serving a page
+    def hostOf(self, i: int):
+        return f"127.0.0.{i % self.HOSTS + 1}"
+
+    def pageURL(self, i: int):
+        return f"http://{self.hostOf(i)}:{self.PORT}/page/{i}"
+
+    def fileURL(self, i: int, extension: str):
+        return f"http://{self.hostOf(i)}:{self.PORT}/files/{i}.{extension}"
+
+    # function starting the site on all host addresses
+    async def start(self):
+        app = web.Application(middlewares=[self.delay])
+        app.router.add_get('/page/{i}', self.handlePage)
+        app.router.add_get('/files/{name}', self.handleFile)
+        app.router.add_get('/robots.txt', self.handleRobots)
+        app.router.add_get('/static/{name}', self.handleStatic)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        for host in range(self.HOSTS):
+            await web.TCPSite(self.runner, f"127.0.0.{host + 1}", self.PORT).start()
+        return self.pageURL(0)
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    # middleware delaying each response by 50-150% of the configured latency
+    @web.middleware
+    async def delay(self, request, handler):
+        await asyncio.sleep(self.LATENCY * (0.5 + self.rng.random()))
+        return await handler(request)
+
+    async def handlePage(self, request):
+        i = int(request.match_info['i'])
+        if i >= self.PAGES:
+            raise web.HTTPNotFound()
+        page = self.pages[i]
+        links = ''.join(f'<li><a href="{link}">{link.rsplit("/", 1)[-1]}</a></li>' for link in page['LINKS'])
+        consent = ''
+        if page['CONSENT']:
+            consent = ('<div id="cookie-banner" style="position:fixed;bottom:0;width:100%;background:#eee">We use cookies. '
+                       '<button onclick="document.getElementById(\'cookie-banner\').remove()">Accept all</button></div>')
+        # stylesheet & image shared by all pages of a host, cacheable like on real sites
+        html = f"<!DOCTYPE html><html><head><title>{page['TITLE']}</title><link rel=\"stylesheet\" href=\"/static/site.css\"></head><body><img src=\"/static/logo.png\"><h1>{page['TITLE']}</h1><p>{page['TEXT']}</p><ul>{links}</ul>{consent}</body></html>"
+        return web.Response(text=html, content_type='text/html')
+
+    async def handleFile(self, request):
+        name = request.match_info['name']
+        i, extension = name.split('.', 1)
+        if extension == 'pdf':
+            return web.Response(body=makePDF(f"Document {i}"), content_type='application/pdf')
+        # binary content derived from the file number, same file gives the same bytes
+        return web.Response(body=random.Random(int(i)).randbytes(self.BINARYSIZE), content_type='application/octet-stream')
+
+    async def handleStatic(self, request):
+        headers = {'Cache-Control': 'public, max-age=3600'}
+        if request.match_info['name'] == 'site.css':
+            return web.Response(text=STYLESHEET, content_type='text/css', headers=headers)
+        if request.match_info['name'] == 'logo.png':
+            return web.Response(body=LOGO, content_type='image/png', headers=headers)
+        raise web.HTTPNotFound()
+
+    async def handleRobots(self, request):
+        return web.Response(text="User-agent: *\nAllow: /\n", content_type='text/plain')
+
+# entry point of the site process, so serving the site competes with the crawler neither for its event loop nor its memory
+def serveSite(siteArgs: tuple, urls, stopped):
+    async def serve():
+        site = SyntheticSiteClass(*siteArgs)
+        urls.put(await site.start())
+        while not stopped.is_set():
+            await asyncio.sleep(0.1)
+        await site.stop()
+    asyncio.run(serve())
+
+class BenchmarkScraperClass(ScraperClass):
+    # scraper recording the duration of every page, until scraped & until done (incl. PDF render)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scrapeLatencies = []
+        self.latencies = []
+        # start time per URL being scraped or rendered
+        self.pageStarts = {}
+
+    async def scrapePage(self, context, url: str, *args, **kwargs):
+        start = time.monotonic()
+        self.pageStarts[url] = start
+        try:
+            return await super().scrapePage(context, url, *args, **kwargs)
+        finally:
+            self.scrapeLatencies.append(time.monotonic() - start)
+
+    # pages are 'done' once saved, PDF pages after the render workers saved their PDF
+    def finishURL(self, url: str, state: str):
+        super().finishURL(url, state)
+        start = self.pageStarts.pop(url, None)
+        if state == 'done' and start is not None:
+            self.latencies.append(time.monotonic() - start)
+
+# get p50 & p95 of durations in seconds
+def percentiles(durations: list):
+    quantiles = statistics.quantiles(durations, n=100) if len(durations) > 1 else [0.0] * 99
+    return round(quantiles[49], 3), round(quantiles[94], 3)
+
+class MemorySamplerClass:
+    # initialize sampler of the peak resident memory of this process incl. child processes (browser) except `excluded` (site)
+    def __init__(self, interval: float = 0.2, excluded: set = None):
+        self.INTERVAL = interval
+        self.excluded = excluded if excluded is not None else set()
+        self.peakRSS = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        return self.peakRSS
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peakRSS = max(self.peakRSS, processTreeRSS(os.getpid(), self.excluded))
+            self.stopped.wait(self.INTERVAL)
+
+# get resident memory in bytes of a process & all its descendants except excluded subtrees (Linux /proc), own peak if /proc is missing
+def processTreeRSS(pid: int, excluded: set = frozenset()):
+    if not Path('/proc').is_dir():
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    parents, rss = {}, {}
+    pageSize = os.sysconf('SC_PAGE_SIZE')
+    for statPath in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = statPath.read_text().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        process = int(statPath.parent.name)
+        parents[process] = int(fields[1])
+        rss[process] = int(fields[21]) * pageSize
+    total = 0
+    stack = [pid]
+    while stack:
+        process = stack.pop()
+        if process in excluded:
+            continue
+        total += rss.get(process, 0)
+        stack.extend(child for child, parent in parents.items() if parent == process)
+    return total
+
+# get short hash of the current commit, None outside a git checkout
+def gitCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# get size in bytes of all files uploaded by blob.uploadToBlob
+def outputSize(directory: Path):
+    return sum(path.stat().st_size for path in directory.glob('**/*') if path.is_file() and path.parent != directory)
+
+# main function serving the synthetic site, crawling it, uploading the output & saving the results
+async def runBenchmark():
+    config = {'PAGES': sitePages, 'FANOUT': fanout, 'HOSTS': siteHosts, 'LATENCY': latency, 'CONSENTSHARE': consentShare,
+              'PDFSHARE': pdfShare, 'BINARYSHARE': binaryShare, 'BINARYSIZE': binarySize, 'DUPLICATESHARE': duplicateShare,
+              'SEED': siteSeed, 'TIERLIMIT': tierLimit, 'OUTPUTFORMAT': outputFormat, 'HTTPFASTPATH': httpFastPath,
+              'BLOCKRESOURCES': blockResources, 'DEDUP': dedup, 'HEADLESS': headless}
+    # serve the site from a separate process (spawned like the shards), its CPU & memory are not measured
+    siteArgs = (sitePages, fanout, siteHosts, sitePort, latency, consentShare, pdfShare, binaryShare, binarySize, duplicateShare, siteSeed)
+    context = multiprocessing.get_context('spawn')
+    urls, stopped = context.Queue(), context.Event()
+    siteProcess = context.Process(target=serveSite, args=(siteArgs, urls, stopped), name='site')
+    siteProcess.start()
+    sampler = MemorySamplerClass(excluded={siteProcess.pid})
+    sampler.start()
+    try:
+        # raises queue.Empty if the site does not come up (e.g. port in use)
+        rootURL = await asyncio.to_thread(urls.get, True, 60)
+        # limits above the site size, crawl state disabled so every run starts cold
+        outputDir = resultsDir / 'output' / time.strftime("%d%m%Y-%H%M%S")
+        scraper = BenchmarkScraperClass(tierLimit, 10 * sitePages, 10 * sitePages, False, httpFastPath=httpFastPath, outputFormat=outputFormat,
+                                        blockResources=blockResources, respectRobots=True, statePath=None, dedup=dedup, outputDir=outputDir, headless=headless)
+        start = time.monotonic()
+        directory = await scraper.runScraper([rootURL])
+        crawlTime = time.monotonic() - start
+    finally:
+        stopped.set()
+        await asyncio.to_thread(siteProcess.join, 10)
+        if siteProcess.is_alive():
+            siteProcess.terminate()
+        peakRSS = sampler.stop()
+
+    records = [json.loads(line) for line in open(directory / 'metadata.jsonl', encoding='utf-8')]
+    latencyP50, latencyP95 = percentiles(scraper.latencies)
+    scrapeP50, scrapeP95 = percentiles(scraper.scrapeLatencies)
+    results = {'COMMIT': gitCommit(), 'TIMESTAMP': int(time.time()), 'CONFIG': config,
+               'PAGES': len(scraper.scrapedPages), 'ALIASES': sum(1 for record in records if 'ALIASOF' in record),
+               'DOWNLOADS': sum(1 for record in records if record['TYPE'] == 'download'),
+               'CRAWLTIME': round(crawlTime, 3), 'PAGESPERSECOND': round(len(scraper.scrapedPages) / crawlTime, 3),
+               'LATENCYP50': latencyP50, 'LATENCYP95': latencyP95, 'SCRAPEP50': scrapeP50, 'SCRAPEP95': scrapeP95,
+               'PEAKRSSMB': round(peakRSS / 1e6, 1), 'BROWSERMB': round(scraper.resourcePolicy.report()['TRANSFERREDBYTES'] / 1e6, 3), 'UPLOADMB': None, 'UPLOADTIME': None, 'UPLOADMBPERSECOND': None}
+
+    if uploadBenchmark:
+        # Azurite's well-known development account unless a connection string is configured
+        os.environ.setdefault('AZURE_STORAGE_CONNECTION_STRING', 'UseDevelopmentStorage=true')
+        os.environ.setdefault('AZURE_CONTAINER_NAME', 'benchmark')
+        uploadSize = outputSize(directory)
+        start = time.monotonic()
+        try:
+            await blob.uploadToBlob(directory)
+            uploadTime = time.monotonic() - start
+            results.update({'UPLOADMB': round(uploadSize / 1e6, 3), 'UPLOADTIME': round(uploadTime, 3), 'UPLOADMBPERSECOND': round(uploadSize / 1e6 / uploadTime, 3)})
+        except Exception as e:
+            logger.error("UPLOAD BENCHMARK FAILED (is Azurite running?): %s", e)
+
+    # save results as JSON, one file per run
+    resultsPath = resultsDir / f"{time.strftime('%Y%m%d-%H%M%S')}-{results['COMMIT'] or 'nogit'}.json"
+    resultsPath.write_text(json.dumps(results, indent=4))
+    print(json.dumps(results, indent=4))
+    logger.info("RESULTS SAVED: %s", resultsPath)
+    return results
+
+# print metrics of two result files side by side, e.g. of the commits before & after a change
+def compareResults(basePath: str, newPath: str):
+    base, new = json.loads(Path(basePath).read_text()), json.loads(Path(newPath).read_text())
+    if base['CONFIG'] != new['CONFIG']:
+        logger.warning("runs used different configurations")
+    print(f"{'METRIC':<20}{base['COMMIT'] or 'base':>12}{new['COMMIT'] or 'new':>12}{'CHANGE':>10}")
+    for metric in ('PAGESPERSECOND', 'LATENCYP50', 'LATENCYP95', 'SCRAPEP50', 'SCRAPEP95', 'PEAKRSSMB', 'BROWSERMB', 'UPLOADMBPERSECOND', 'CRAWLTIME', 'PAGES'):
+        before, after = base.get(metric), new.get(metric)
+        change = f"{(after - before) / before * 100:+.1f}%" if before and after is not None else '-'
+        print(f"{metric:<20}{str(before):>12}{str(after):>12}{change:>10}")
+
+if __name__ == '__main__':
+    # python benchmark.py                  -> run benchmark
+    # python benchmark.py base.json new.json -> compare two runs
+    if len(sys.argv) == 3:
+        compareResults(sys.argv[1], sys.argv[2])
+    else:
+        configureLogging('INFO')
+        resultsDir.mkdir(parents=True, exist_ok=True)
+        asyncio.run(runBenchmark())
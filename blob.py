@@ -1,68 +1,137 @@
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import ContentSettings
+from azure.storage.blob.aio import BlobServiceClient
+from azure.core.exceptions import ResourceExistsError
+from azure.core.pipeline.transport import AioHttpTransport
 from pathlib import Path
+import aiohttp
+import asyncio
+import hashlib
 import json
+import logging
 import os
 from dotenv import load_dotenv
+from instrumentation import MetricsClass
 
-# main function to upload all files in directory to blob storage, incl. metadata
-async def uploadToBlob(directory: Path):
+# files above this size are uploaded as chunked block blobs
+MAXSINGLEPUTSIZE = 8 * 1024 * 1024
+# size of a single block for chunked uploads
+MAXBLOCKSIZE = 4 * 1024 * 1024
+# size of chunks read when hashing files
+HASHCHUNKSIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+# main function to upload all files in directory to blob storage, incl. metadata; upload stages are recorded in metrics if given
+async def uploadToBlob(directory: Path, maxConcurrency: int = None, metrics: MetricsClass = None):
     # load environment variables from .env
     load_dotenv()
-    # get connection string from environment
+    # get connection string from environment (use the Azurite connection string for local testing)
     connectionString = os.environ['AZURE_STORAGE_CONNECTION_STRING']
     # get container name from environment (default: 'webscraper')
     containerName = os.environ.get('AZURE_CONTAINER_NAME', 'webscraper')
-    # connect to blob storage using connection string
-    blobServiceClient = BlobServiceClient.from_connection_string(connectionString)
-    containerClient = blobServiceClient.get_container_client(containerName)
-    # open metadata json
+    # get number of parallel uploads from environment (default: 8)
+    if maxConcurrency is None:
+        maxConcurrency = int(os.environ.get('AZURE_UPLOAD_CONCURRENCY', 8))
+    # open metadata json & index metadata by ID once
     metadataFile = json.loads(open(directory / 'metadata.json').read())
+    metadataIndex = indexMetadata(metadataFile)
+    if metrics is None:
+        metrics = MetricsClass()
+    # collect files to be uploaded; files directly in directory belong to the run (metadata, traces, metrics), scraped files are in subdirectories
+    filePaths = [filePath for filePath in directory.glob('**/*') if filePath.is_file() and filePath.parent != directory]
 
-    # iterate through all files in directory
-    for filePath in directory.glob('**/*'):
-        if filePath.is_file() and filePath.name != 'metadata.json':
-            # get metadata for file
-            fileID = filePath.name.split('.')[0]
-            metadataDict = getMetadata(metadataFile, fileID)
-            # create blob path: session_timestamp/relative_path
-            relativePath = filePath.relative_to(directory)
-            blobPath = f"{directory.name}/{relativePath}"
-            blobClient = containerClient.get_blob_client(blobPath)
-            # upload file including metadata
-            with open(filePath, 'rb') as data:
-                try:
-                    blobClient.upload_blob(data, metadata=metadataDict)
-                    print(f'Uploaded {filePath.name}')
-                except Exception as e:
-                    print(f'Error uploading {filePath.name}', e)
-    
-# get metadata for file
-def getMetadata(data, targetID):
-    # recursively search list metadata for targetID
-    if isinstance(data, list):
-        for item in data:
-            result = getMetadata(item, targetID)
-            if result:
+    # shared connection pool sized to the number of parallel uploads
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=maxConcurrency))
+    transport = AioHttpTransport(session=session, session_owner=False)
+    try:
+        # connect to blob storage using connection string
+        async with BlobServiceClient.from_connection_string(connectionString, transport=transport, max_single_put_size=MAXSINGLEPUTSIZE, max_block_size=MAXBLOCKSIZE) as blobServiceClient:
+            containerClient = blobServiceClient.get_container_client(containerName)
+            # create container if missing (e.g. fresh Azurite instance)
+            try:
+                await containerClient.create_container()
+            except ResourceExistsError:
+                pass
+            # get content hashes of blobs uploaded by a previous (interrupted) run
+            existingBlobs = {}
+            async for blobProperties in containerClient.list_blobs(name_starts_with=f"{directory.name}/"):
+                existingBlobs[blobProperties.name] = blobProperties.content_settings.content_md5
+            # upload files in parallel, limited by semaphore
+            semaphore = asyncio.Semaphore(maxConcurrency)
+            results = await asyncio.gather(*[uploadFile(containerClient, semaphore, directory, filePath, metadataIndex, existingBlobs, metrics) for filePath in filePaths])
+    finally:
+        await session.close()
+    logger.info("UPLOAD COMPLETED: %d uploaded, %d skipped, %d failed", results.count('uploaded'), results.count('skipped'), results.count('failed'))
+    return results
+
+# upload a single file including metadata; skips files already uploaded with the same content hash
+async def uploadFile(containerClient, semaphore: asyncio.Semaphore, directory: Path, filePath: Path, metadataIndex: dict, existingBlobs: dict, metrics: MetricsClass):
+    async with semaphore:
+        metadataDict = metadataIndex.get(fileID(filePath))
+        # create blob path: session_timestamp/relative_path
+        relativePath = filePath.relative_to(directory)
+        blobPath = f"{directory.name}/{relativePath.as_posix()}"
+        trace = metrics.startPage(relativePath.as_posix(), kind='upload')
+        result = 'failed'
+        try:
+            # hash file without blocking the event loop
+            with metrics.stage('hash'):
+                contentMD5 = await asyncio.to_thread(hashFile, filePath)
+            if existingBlobs.get(blobPath) is not None and bytes(existingBlobs[blobPath]) == contentMD5:
+                logger.debug("Skipped %s (already uploaded)", filePath.name)
+                result = 'skipped'
                 return result
-    # recursively dictionary metadata for targetID
-    elif isinstance(data, dict):
-        # if ID matches targetID, construct & return metadataDict
-        if data.get("ID") == targetID:
-            metadataDict = {'ID': data.get('ID'),
-                            'TIMESTAMP': str(data.get('TIMESTAMP')),
-                            'TYPE': data.get('TYPE'),
-                            'URL': data.get('URL'),
-                            'TIER': str(data.get('TIER')),
-                            'TITLE': cleanMetadataText(data.get('TITLE')),
-                            'PARENT': data.get('PARENT') if data.get('PARENT') is not None else 'None'}
-            return metadataDict
-        # iterate over metadata
-        for key, value in data.items():
-            if isinstance(value, (list, dict)):
-                result = getMetadata(value, targetID)
-                if result:
-                    return result
-    return None
+            # upload file including metadata & content hash; large files are uploaded in parallel blocks
+            with open(filePath, 'rb') as data, metrics.stage('upload'):
+                size = filePath.stat().st_size
+                await containerClient.upload_blob(blobPath, data, length=size, metadata=metadataDict, overwrite=True,
+                                                  content_settings=ContentSettings(content_md5=contentMD5), max_concurrency=4)
+            metrics.addBytes(size)
+            logger.debug("Uploaded %s", filePath.name)
+            result = 'uploaded'
+            return result
+        except Exception as e:
+            logger.error("Error uploading %s: %s", filePath.name, e)
+            return result
+        finally:
+            metrics.finishPage(trace, 0 if result == 'failed' else 200)
+
+# get ID of a scraped file; pages are saved as <ID>.<extension>, downloads as <ID>_<filename> (IDs contain neither '.' nor '_')
+def fileID(filePath: Path):
+    return filePath.name.split('.')[0].split('_')[0]
+
+# compute MD5 of a file in chunks, stored as blob content hash
+def hashFile(filePath: Path):
+    md5Hash = hashlib.md5()
+    with open(filePath, 'rb') as data:
+        for chunk in iter(lambda: data.read(HASHCHUNKSIZE), b''):
+            md5Hash.update(chunk)
+    return md5Hash.digest()
+
+# build ID -> metadata index in a single pass over the metadata tree
+def indexMetadata(data, index: dict = None):
+    if index is None:
+        index = {}
+    # iterate nodes iteratively to avoid deep recursion on large trees
+    stack = list(data) if isinstance(data, list) else [data]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, dict):
+            continue
+        if item.get('ID') is not None:
+            index[item['ID']] = formatMetadata(item)
+        stack.extend(item.get('CHILDREN', []))
+    return index
+
+# construct blob metadata dictionary from metadata node
+def formatMetadata(data: dict):
+    return {'ID': data.get('ID'),
+            'TIMESTAMP': str(data.get('TIMESTAMP')),
+            'TYPE': data.get('TYPE'),
+            'URL': data.get('URL'),
+            'TIER': str(data.get('TIER')),
+            'TITLE': cleanMetadataText(data.get('TITLE')),
+            'PARENT': data.get('PARENT') if data.get('PARENT') is not None else 'None'}
 
 # clean up text to conform with required encoding (ASCII) for blob storage metadata
 def cleanMetadataText(text: str):
@@ -0,0 +1,130 @@
+from pathlib import Path
+import sqlite3
+import json
+import time
+
+# database schema: runs, frontier (seen set & queue) per run, latest result per URL across runs
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    seeds TEXT NOT NULL,
+    outputDir TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    run INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    tier INTEGER NOT NULL,
+    parent TEXT,
+    seed INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (run, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS frontierState ON frontier (run, state);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    lastModified TEXT,
+    contentHash TEXT,
+    links TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    outputDir TEXT NOT NULL,
+    updated INTEGER NOT NULL
+);
+"""
+
+class CrawlStoreClass:
+    # initialize on-disk crawl store (SQLite)
+    def __init__(self, path: Path, commitInterval: int = 100):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        # write-ahead log keeps writes cheap & the database consistent after a crash
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        # number of writes between two commits
+        self.COMMITINTERVAL = commitInterval
+        self.pendingWrites = 0
+        self.run = None
+
+    # function starting a run; resumes the last run with the same topLevelURLs if it did not finish
+    def startRun(self, seeds: list, outputDir: Path):
+        seedsKey = json.dumps(seeds)
+        row = self.connection.execute('SELECT id, outputDir, status FROM runs WHERE seeds = ? ORDER BY id DESC LIMIT 1', (seedsKey,)).fetchone()
+        if row is not None and row[2] == 'running' and Path(row[1]).is_dir():
+            self.run = {'ID': row[0], 'OUTPUTDIR': Path(row[1]), 'RESUMED': True}
+        else:
+            cursor = self.connection.execute('INSERT INTO runs (seeds, outputDir, status, started) VALUES (?, ?, ?, ?)',
+                                             (seedsKey, str(outputDir), 'running', int(time.time())))
+            self.run = {'ID': cursor.lastrowid, 'OUTPUTDIR': Path(outputDir), 'RESUMED': False}
+        self.connection.commit()
+        return self.run
+
+    # function loading the frontier of the current run: seen fingerprints, queued URLs & scraped pages per seed
+    def loadFrontier(self):
+        fingerprints = [self.fromSigned(row[0]) for row in self.connection.execute('SELECT fingerprint FROM frontier WHERE run = ?', (self.run['ID'],))]
+        queued = [{'URL': row[0], 'TIER': row[1], 'PARENT': row[2], 'SEED': row[3]}
+                  for row in self.connection.execute("SELECT url, tier, parent, seed FROM frontier WHERE run = ? AND state = 'queued'", (self.run['ID'],))]
+        counts = dict(self.connection.execute("SELECT seed, COUNT(*) FROM frontier WHERE run = ? AND state = 'done' GROUP BY seed", (self.run['ID'],)).fetchall())
+        return fingerprints, queued, counts
+
+    # function adding a URL to the frontier of the current run
+    def enqueue(self, urlDict: dict, fingerprint: int):
+        self.connection.execute("INSERT OR IGNORE INTO frontier (run, fingerprint, url, tier, parent, seed, state) VALUES (?, ?, ?, ?, ?, ?, 'queued')",
+                                (self.run['ID'], self.toSigned(fingerprint), urlDict['URL'], urlDict['TIER'], urlDict['PARENT'], urlDict['SEED']))
+        self.commit()
+
+    # function marking a URL of the frontier as 'done' (scraped or failed) or 'skipped' (limit reached, disallowed)
+    def finish(self, fingerprint: int, state: str):
+        self.connection.execute('UPDATE frontier SET state = ? WHERE run = ? AND fingerprint = ?', (state, self.run['ID'], self.toSigned(fingerprint)))
+        # commit once per finished URL (incl. the children it queued), metadata.jsonl is flushed per record as well,
+        # so a resumed run neither loses the frontier nor scrapes pages already in metadata.jsonl again
+        self.commit(force=True)
+
+    # function getting the latest result of a URL from any previous run, None if never scraped
+    def result(self, url: str):
+        row = self.connection.execute('SELECT etag, lastModified, contentHash, links, metadata, outputDir FROM results WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        return {'ETAG': row[0], 'LASTMODIFIED': row[1], 'CONTENTHASH': row[2], 'LINKS': json.loads(row[3]), 'METADATA': json.loads(row[4]), 'OUTPUTDIR': row[5]}
+
+    # function saving the result of a scraped URL incl. validators for conditional requests
+    def saveResult(self, url: str, metadata: dict, links: list, etag: str = None, lastModified: str = None, contentHash: str = None, outputDir: Path = None):
+        outputDir = outputDir if outputDir is not None else self.run['OUTPUTDIR']
+        self.connection.execute('INSERT OR REPLACE INTO results (url, etag, lastModified, contentHash, links, metadata, outputDir, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                (url, etag, lastModified, contentHash, json.dumps(links), json.dumps(metadata), str(outputDir), int(time.time())))
+        self.commit()
+
+    # function building conditional request headers from a previous result
+    def conditionalHeaders(self, result: dict):
+        headers = {}
+        if result is not None and result['ETAG']:
+            headers['If-None-Match'] = result['ETAG']
+        if result is not None and result['LASTMODIFIED']:
+            headers['If-Modified-Since'] = result['LASTMODIFIED']
+        return headers
+
+    # function marking the current run as finished so the next run starts a new (incremental) crawl
+    def finishRun(self):
+        self.connection.execute("UPDATE runs SET status = 'finished' WHERE id = ?", (self.run['ID'],))
+        self.commit(force=True)
+
+    # function committing pending writes every COMMITINTERVAL writes
+    def commit(self, force: bool = False):
+        self.pendingWrites += 1
+        if force or self.pendingWrites >= self.COMMITINTERVAL:
+            self.connection.commit()
+            self.pendingWrites = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    # SQLite integers are signed 64-bit, fingerprints are unsigned
+    def toSigned(self, fingerprint: int):
+        return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+    def fromSigned(self, value: int):
+        return value + (1 << 64) if value < 0 else value
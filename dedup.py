@@ -0,0 +1,74 @@
+from pathlib import Path
+import hashlib
+import re
+
+# compute SHA-256 of a file in chunks
+def hashFile(path: Path):
+    sha256Hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            sha256Hash.update(chunk)
+    return sha256Hash.hexdigest()
+
+class DedupClass:
+    # initialize duplicate detection; pages whose SimHash differs in at most maxDistance bits are near-duplicates
+    def __init__(self, maxDistance: int = 3, minTokens: int = 50, shingleSize: int = 3, minExactTokens: int = 5):
+        # limit of differing SimHash bits for near-duplicates (must be < BANDS for the band index to find all matches)
+        self.MAXDISTANCE = maxDistance
+        # texts with fewer tokens are only compared exactly, SimHash is unreliable on short texts
+        self.MINTOKENS = minTokens
+        # texts with fewer tokens are not compared at all, e.g. empty shells of SPAs or pages blocked by a login
+        self.MINEXACTTOKENS = minExactTokens
+        # number of consecutive tokens per shingle
+        self.SHINGLESIZE = shingleSize
+        # number of 16-bit bands of the 64-bit SimHash used for candidate lookup
+        self.BANDS = 4
+        # canonical page/download per exact content hash (SHA-256)
+        self.exact = {}
+        # canonical page per SimHash, indexed per band: (band, bits) -> list of (simhash, canonical)
+        self.bands = {}
+
+    # function checking downloaded bytes by SHA-256; returns canonical entry if duplicate, otherwise registers entry
+    def checkBytes(self, sha256: str, entry: dict):
+        key = f"bytes:{sha256}"
+        if key in self.exact:
+            return self.exact[key]
+        self.exact[key] = entry
+        return None
+
+    # function checking page text (exact & near-duplicates); returns canonical entry if duplicate, otherwise registers entry
+    def checkText(self, text: str, entry: dict):
+        tokens = re.findall(r'\w+', text.lower())
+        # too little text to tell pages apart, keep the page
+        if len(tokens) < self.MINEXACTTOKENS:
+            return None
+        # exact duplicate of normalized text
+        key = 'text:' + hashlib.sha256(' '.join(tokens).encode()).hexdigest()
+        if key in self.exact:
+            return self.exact[key]
+        self.exact[key] = entry
+        if len(tokens) < self.MINTOKENS:
+            return None
+        # near-duplicate by SimHash: any match within MAXDISTANCE shares at least one band
+        fingerprint = self.simhash(tokens)
+        bandKeys = [(band, (fingerprint >> (16 * band)) & 0xFFFF) for band in range(self.BANDS)]
+        for bandKey in bandKeys:
+            for candidate, canonical in self.bands.get(bandKey, []):
+                if bin(candidate ^ fingerprint).count('1') <= self.MAXDISTANCE:
+                    return canonical
+        for bandKey in bandKeys:
+            self.bands.setdefault(bandKey, []).append((fingerprint, entry))
+        return None
+
+    # function computing 64-bit SimHash over word shingles
+    def simhash(self, tokens: list):
+        shingles = set(' '.join(tokens[i:i + self.SHINGLESIZE]) for i in range(max(1, len(tokens) - self.SHINGLESIZE + 1)))
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big') for shingle in shingles]
+        # bit is set if most shingle hashes have it set
+        fingerprint = 0
+        half = len(hashes) / 2
+        for bit in range(64):
+            mask = 1 << bit
+            if sum(1 for h in hashes if h & mask) > half:
+                fingerprint |= mask
+        return fingerprint
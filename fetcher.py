@@ -0,0 +1,177 @@
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, unquote
+from pathlib import Path
+import aiohttp
+import hashlib
+import logging
+import re
+
+# content types handled as HTML pages, everything else is treated as a download
+HTMLTYPES = ('text/html', 'application/xhtml+xml')
+# markers of pages that only render their content with JavaScript
+JSMARKERS = ('id="root"', 'id="app"', 'id="__next"', '__NEXT_DATA__', 'ng-app', 'data-reactroot', 'enable javascript')
+# elements whose content is not part of the visible text
+SKIPTEXTTAGS = ('script', 'style', 'noscript', 'template', 'head')
+# user agent of a regular browser, some servers reject unknown clients
+USERAGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+logger = logging.getLogger(__name__)
+
+class FetcherClass:
+    # initialize HTTP client used for pre-flight checks, downloads & static pages
+    def __init__(self, maxConnections: int = 20, timeout: int = 30, maxDownloadSize: int = 100 * 1024 * 1024):
+        # limit number of pooled connections
+        self.MAXCONNECTIONS = maxConnections
+        # limit time per request in seconds
+        self.TIMEOUT = timeout
+        # limit size of downloads in bytes
+        self.MAXDOWNLOADSIZE = maxDownloadSize
+        # size of chunks streamed to disk
+        self.CHUNKSIZE = 64 * 1024
+        self.session = None
+
+    async def __aenter__(self):
+        # pooled session shared by all requests of the crawl
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.MAXCONNECTIONS),
+                                             timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+                                             headers={'User-Agent': USERAGENT})
+        return self
+
+    async def __aexit__(self, *excInfo):
+        await self.session.close()
+
+    # function checking content type of URL with HEAD (or ranged GET if HEAD is not supported); returns None if it fails
+    # throttling responses (429/503) are returned so the caller can back off
+    async def preflight(self, url: str, headers: dict = None):
+        # optional conditional headers (If-None-Match, If-Modified-Since) turn unchanged URLs into 304 responses
+        headers = headers or {}
+        try:
+            async with self.session.head(url, allow_redirects=True, headers=headers) as response:
+                if response.status < 400 or response.status == 429:
+                    return self.responseInfo(response)
+            # some servers refuse HEAD requests, ask for first byte only instead
+            async with self.session.get(url, headers={**headers, 'Range': 'bytes=0-0'}) as response:
+                if response.status < 400 or response.status in (429, 503):
+                    return self.responseInfo(response)
+        except Exception as e:
+            logger.warning("PREFLIGHT FAILED: %s %s", url, e)
+        return None
+
+    # function extracting routing information from response headers
+    def responseInfo(self, response):
+        contentType = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        return {'URL': str(response.url),
+                'STATUS': response.status,
+                'CONTENTTYPE': contentType,
+                'HTML': contentType in HTMLTYPES or contentType == '',
+                'FILENAME': self.filename(str(response.url), response.headers.get('Content-Disposition', '')),
+                'ETAG': response.headers.get('ETag'),
+                'LASTMODIFIED': response.headers.get('Last-Modified'),
+                'LENGTH': int(response.headers['Content-Length']) if response.headers.get('Content-Length', '').isdigit() else None}
+
+    # function getting file name from Content-Disposition header or URL path
+    def filename(self, url: str, disposition: str):
+        match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', disposition, re.IGNORECASE)
+        name = unquote(match.group(1)) if match else unquote(urlsplit(url).path.rstrip('/').split('/')[-1])
+        # remove characters which are not allowed in file names
+        name = re.sub(r'[\\/:*?"<>|\s]+', '_', name).strip('._')
+        return name or 'download'
+
+    # function streaming a download to disk while hashing it; returns SHA-256 & size, None if size cap is exceeded
+    async def download(self, url: str, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sha256Hash = hashlib.sha256()
+        size = 0
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            # skip download early if announced size exceeds cap
+            if response.content_length is not None and response.content_length > self.MAXDOWNLOADSIZE:
+                logger.warning("DOWNLOAD TOO LARGE: %s", url)
+                return None
+            with open(path, 'wb') as file:
+                async for chunk in response.content.iter_chunked(self.CHUNKSIZE):
+                    size += len(chunk)
+                    # abort download if actual size exceeds cap
+                    if size > self.MAXDOWNLOADSIZE:
+                        break
+                    sha256Hash.update(chunk)
+                    file.write(chunk)
+        if size > self.MAXDOWNLOADSIZE:
+            path.unlink(missing_ok=True)
+            logger.warning("DOWNLOAD TOO LARGE: %s", url)
+            return None
+        return {'SHA256': sha256Hash.hexdigest(), 'SIZE': size}
+
+    # function fetching a static HTML page; returns final URL, status, html, title, text, links, anchor texts & validators
+    async def fetchHTML(self, url: str):
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            finalURL = str(response.url)
+            status = response.status
+            etag = response.headers.get('ETag')
+            lastModified = response.headers.get('Last-Modified')
+            html = await response.text(errors='replace')
+        parser = LinkParser(finalURL)
+        parser.feed(html)
+        parser.close()
+        text = re.sub(r'\s+', ' ', ' '.join(parser.texts)).strip()
+        return {'URL': finalURL, 'STATUS': status, 'HTML': html, 'TITLE': parser.title.strip(), 'TEXT': text, 'LINKS': parser.links,
+                'ANCHORS': {link: re.sub(r'\s+', ' ', anchor).strip() for link, anchor in parser.anchors.items()}, 'ETAG': etag, 'LASTMODIFIED': lastModified}
+
+    # function checking if a fetched page needs a browser to render its content
+    def needsRendering(self, page: dict):
+        html = page['HTML'].lower()
+        if any(marker.lower() in html for marker in JSMARKERS):
+            return True
+        # pages without links but with scripts most likely build their content with JavaScript
+        return len(page['LINKS']) == 0 and '<script' in html
+
+class LinkParser(HTMLParser):
+    # initialize parser collecting title, visible text, duplicate free list of absolute links & their anchor texts
+    def __init__(self, baseURL: str):
+        super().__init__(convert_charrefs=True)
+        self.baseURL = baseURL
+        self.title = ''
+        self.texts = []
+        self.links = []
+        self.seen = set()
+        # anchor text of the first link to each URL
+        self.anchors = {}
+        # link whose anchor text is being collected
+        self.anchor = None
+        self.inTitle = False
+        # depth of elements without visible text (script, style, ...)
+        self.skipDepth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        # respect <base href> for resolving relative links
+        if tag == 'base' and attrs.get('href'):
+            self.baseURL = urljoin(self.baseURL, attrs['href'])
+        elif tag == 'a' and attrs.get('href'):
+            link = urljoin(self.baseURL, attrs['href'].strip())
+            if link not in self.seen:
+                self.seen.add(link)
+                self.links.append(link)
+                self.anchors[link] = attrs.get('title') or attrs.get('aria-label') or ''
+                self.anchor = link
+        elif tag == 'title':
+            self.inTitle = True
+        if tag in SKIPTEXTTAGS:
+            self.skipDepth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self.inTitle = False
+        elif tag == 'a':
+            self.anchor = None
+        if tag in SKIPTEXTTAGS and self.skipDepth > 0:
+            self.skipDepth -= 1
+
+    def handle_data(self, data):
+        if self.inTitle:
+            self.title += data
+        elif self.skipDepth == 0:
+            self.texts.append(data)
+            if self.anchor is not None:
+                self.anchors[self.anchor] += ' ' + data
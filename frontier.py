@@ -0,0 +1,51 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import hashlib
+
+# default ports which are dropped when normalizing URLs
+DEFAULTPORTS = {'http': 80, 'https': 443}
+
+class FrontierClass:
+    # initialize frontier holding the fingerprints of all URLs ever enqueued
+    def __init__(self):
+        # 64-bit fingerprints of normalized URLs (ints instead of full strings keep memory bounded)
+        self.seen = set()
+
+    # function marking a URL as seen; returns True if it was not seen before
+    def add(self, url: str):
+        fingerprint = self.fingerprint(url)
+        if fingerprint in self.seen:
+            return False
+        self.seen.add(fingerprint)
+        return True
+
+    # function checking if a URL was already seen
+    def __contains__(self, url: str):
+        return self.fingerprint(url) in self.seen
+
+    # function returning number of seen URLs
+    def __len__(self):
+        return len(self.seen)
+
+    # function computing a 64-bit fingerprint of the normalized URL
+    def fingerprint(self, url: str):
+        digest = hashlib.blake2b(self.normalizeURL(url).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    # function normalizing URLs so that equivalent spellings map to the same fingerprint
+    def normalizeURL(self, url: str):
+        try:
+            parts = urlsplit(url.strip())
+            scheme = parts.scheme.lower()
+            host = (parts.hostname or '').lower()
+            port = parts.port
+        except ValueError:
+            # malformed URL (e.g. invalid port), fingerprint as is
+            return url
+        # keep port only if it is not the default port of the scheme
+        netloc = host if port is None or DEFAULTPORTS.get(scheme) == port else f"{host}:{port}"
+        # collapse trailing slashes, root path is always '/'
+        path = parts.path.rstrip('/') or '/'
+        # sort query parameters so their order does not matter
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        # drop fragment, it never changes the fetched document
+        return urlunsplit((scheme, netloc, path, query, ''))
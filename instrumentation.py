@@ -0,0 +1,132 @@
+from collections import defaultdict
+from pathlib import Path
+import contextlib
+import contextvars
+import logging
+import json
+import time
+from linkfilter import hostOf
+
+# format of log lines, shared by the main process & shard processes
+LOGFORMAT = '%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s'
+# trace of the page handled by the current task; every worker is its own task, so traces never mix
+CURRENTTRACE = contextvars.ContextVar('currentTrace', default=None)
+# shared no-op stage returned while metrics are disabled
+NULLSTAGE = contextlib.nullcontext()
+
+# configure leveled logging of all modules, e.g. 'INFO' or 'DEBUG'
+def configureLogging(level='INFO'):
+    logging.basicConfig(level=level, format=LOGFORMAT)
+
+class StageClass:
+    # timer adding its duration to the current page trace & the per-stage totals
+    def __init__(self, metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *excInfo):
+        duration = time.monotonic() - self.start
+        totals = self.metrics.stages[self.name]
+        totals['COUNT'] += 1
+        totals['SECONDS'] += duration
+        trace = CURRENTTRACE.get()
+        if trace is not None:
+            trace['STAGES'][self.name] = round(trace['STAGES'].get(self.name, 0.0) + duration, 4)
+        return False
+
+class MetricsClass:
+    # initialize instrumentation; disabled (near-zero cost) unless a trace or metrics path is given
+    def __init__(self, tracePath: Path = None, metricsPath: Path = None, writeInterval: int = 100):
+        self.enabled = tracePath is not None or metricsPath is not None
+        # JSONL trace with one record per page (stages, status, bytes), line buffered
+        self.traceFile = open(tracePath, 'a', buffering=1, encoding='utf-8') if tracePath is not None else None
+        # Prometheus text format file, rewritten every writeInterval pages & on close
+        self.metricsPath = Path(metricsPath) if metricsPath is not None else None
+        self.WRITEINTERVAL = writeInterval
+        # number of calls & seconds per stage
+        self.stages = defaultdict(lambda: {'COUNT': 0, 'SECONDS': 0.0})
+        # counters per host
+        self.hosts = defaultdict(lambda: {'PAGES': 0, 'ERRORS': 0, 'BYTES': 0, 'SECONDS': 0.0})
+        self.pages = 0
+        # scheduler whose per-host queue depth is exported
+        self.scheduler = None
+
+    # function setting the scheduler whose queue depth per host is exported
+    def attachQueue(self, scheduler):
+        self.scheduler = scheduler
+
+    # function starting the trace of a page in the current task; returns None while disabled
+    def startPage(self, url: str, tier: int = None, kind: str = 'page'):
+        if not self.enabled:
+            return None
+        trace = {'URL': url, 'HOST': hostOf(url), 'KIND': kind, 'TIER': tier, 'TIMESTAMP': time.time(),
+                 'STATUS': None, 'BYTES': 0, 'STAGES': {}, 'START': time.monotonic()}
+        CURRENTTRACE.set(trace)
+        return trace
+
+    # function timing a stage of the current page, usage: with metrics.stage('goto'): ...
+    def stage(self, name: str):
+        if not self.enabled:
+            return NULLSTAGE
+        return StageClass(self, name)
+
+    # function adding transferred or saved bytes to the current page
+    def addBytes(self, size: int):
+        trace = CURRENTTRACE.get()
+        if trace is not None:
+            trace['BYTES'] += size
+
+    # function finishing the trace of a page: updates host counters & writes the trace record
+    def finishPage(self, trace: dict, status: int = None):
+        if trace is None:
+            return
+        CURRENTTRACE.set(None)
+        trace['STATUS'] = status
+        trace['DURATION'] = round(time.monotonic() - trace.pop('START'), 4)
+        # skipped URLs (limits, robots.txt) are traced but not counted as pages
+        if status is not None and trace['HOST']:
+            host = self.hosts[trace['HOST']]
+            host['PAGES'] += 1
+            host['BYTES'] += trace['BYTES']
+            host['SECONDS'] += trace['DURATION']
+            if status == 0 or status >= 400:
+                host['ERRORS'] += 1
+        if self.traceFile is not None:
+            self.traceFile.write(json.dumps(trace) + '\n')
+        self.pages += 1
+        if self.pages % self.WRITEINTERVAL == 0:
+            self.writeMetrics()
+
+    # function writing all metrics in Prometheus text format (replaced atomically, e.g. for the node exporter textfile collector)
+    def writeMetrics(self):
+        if self.metricsPath is None:
+            return
+        lines = ['# HELP scraper_stage_seconds Time spent per stage', '# TYPE scraper_stage_seconds summary']
+        for name, totals in sorted(self.stages.items()):
+            lines.append(f'scraper_stage_seconds_sum{{stage="{name}"}} {totals["SECONDS"]:.4f}')
+            lines.append(f'scraper_stage_seconds_count{{stage="{name}"}} {totals["COUNT"]}')
+        for metric, key, kind, description in (('scraper_host_pages_total', 'PAGES', 'counter', 'Pages scraped per host'),
+                                               ('scraper_host_errors_total', 'ERRORS', 'counter', 'Failed pages per host'),
+                                               ('scraper_host_bytes_total', 'BYTES', 'counter', 'Bytes downloaded or saved per host'),
+                                               ('scraper_host_seconds_total', 'SECONDS', 'counter', 'Time spent on pages per host')):
+            lines += [f'# HELP {metric} {description}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{host="{host}"}} {counters[key]}' for host, counters in sorted(self.hosts.items())]
+        if self.scheduler is not None:
+            lines += ['# HELP scraper_host_queue_depth URLs waiting per host', '# TYPE scraper_host_queue_depth gauge']
+            lines += [f'scraper_host_queue_depth{{host="{host}"}} {depth}' for host, depth in sorted(self.scheduler.queueDepths().items())]
+        temporaryPath = self.metricsPath.with_name(self.metricsPath.name + '.tmp')
+        temporaryPath.write_text('\n'.join(lines) + '\n')
+        temporaryPath.replace(self.metricsPath)
+
+    # function writing the final metrics & closing the trace
+    def close(self):
+        if not self.enabled:
+            return
+        self.writeMetrics()
+        if self.traceFile is not None:
+            self.traceFile.close()
+            self.traceFile = None
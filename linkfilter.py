@@ -0,0 +1,74 @@
+from urllib.parse import urlsplit
+from functools import lru_cache
+import tldextract
+import re
+
+# domain extractor using the public suffix snapshot bundled with tldextract, never fetches the list over the network
+EXTRACTOR = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None, fallback_to_snapshot=True)
+# only web pages are crawled (drops mailto:, tel:, javascript:, data:, ...)
+SCHEMEPATTERN = re.compile(r'^https?://', re.IGNORECASE)
+
+# collects duplicate free http(s) links without fragments & their anchor texts in the page itself, so only candidate links cross to Python
+LINKSCRIPT = """anchors => {
+    const seen = new Set();
+    const links = [];
+    for (const anchor of anchors) {
+        if (anchor.protocol !== 'http:' && anchor.protocol !== 'https:') continue;
+        const href = anchor.href.split('#')[0];
+        if (href.length > 0 && !seen.has(href)) {
+            seen.add(href);
+            const text = anchor.textContent.trim() || anchor.title || anchor.getAttribute('aria-label') || '';
+            links.push([href, text.replace(/\\s+/g, ' ').trim().slice(0, 200)]);
+        }
+    }
+    return links;
+}"""
+
+# extract domain parts of a host, cached since the same hosts repeat on every page
+@lru_cache(maxsize=100000)
+def extractHost(host: str):
+    return EXTRACTOR(host)
+
+# get host of a URL in lower case
+def hostOf(url: str):
+    try:
+        return (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+
+# get registered domain (domain & suffix) of a URL, e.g. 'bbc.co.uk'
+def registeredDomain(url: str):
+    extractURL = extractHost(hostOf(url))
+    return f"{extractURL.domain}.{extractURL.suffix}"
+
+# get domain name without suffix of a URL, e.g. 'bbc'
+def domainName(url: str):
+    return extractHost(hostOf(url)).domain
+
+class LinkFilterClass:
+    # initialize link filter with the crawl rules
+    def __init__(self, excludedDomains: set, tierLimit: int, domainLimit: bool):
+        self.excludedDomains = excludedDomains
+        self.TIERLIMIT = tierLimit
+        self.DOMAINLIMIT = domainLimit
+
+    # function filtering all links found on a page at once; returns links passing scheme, tier, exclusion & domain rules
+    def filterLinks(self, links: list, tier: int, parent: str):
+        # links of pages beyond the tier limit are never queued
+        if tier > self.TIERLIMIT:
+            return []
+        # parse parent only once per page
+        parentDomain = registeredDomain(parent) if self.DOMAINLIMIT else None
+        validLinks = []
+        for link in links:
+            if not SCHEMEPATTERN.match(link):
+                continue
+            extractURL = extractHost(hostOf(link))
+            # check if URL is an excluded URL
+            if extractURL.domain in self.excludedDomains:
+                continue
+            # only add URL within domain if domainLimit is set
+            if parentDomain is not None and f"{extractURL.domain}.{extractURL.suffix}" != parentDomain:
+                continue
+            validLinks.append(link)
+        return validLinks
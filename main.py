@@ -1,7 +1,11 @@
 import asyncio
+import logging
 from scraper import ScraperClass
+from sharding import ShardedScraperClass
 from search import SearchClass
+from relevance import RelevanceScorerClass
 import blob
+from instrumentation import configureLogging
 
 # list of top level URLs 
 topLevelURLs = ['https://www.google.com/']
@@ -20,31 +24,71 @@ tierLimit = 1
 totalScrapingLimit = 1000
 scrapingLimit = 20
 domainLimit = True
+# crawl all top level URLs concurrently on one shared browser
+concurrentSeeds = True
+# check content type over HTTP first; downloads & static pages skip the browser
+httpFastPath = True
+# format pages are saved in: 'pdf', 'mhtml', 'html' or 'text'
+outputFormat = 'pdf'
+# tiers rendered as PDF (None = all tiers), other tiers are saved as HTML
+pdfTiers = None
+# skip URLs disallowed by robots.txt & respect its crawl-delay
+respectRobots = True
+# crawl store for resuming interrupted crawls & incremental recrawls (None = disabled)
+statePath = './output/crawl.db'
+# skip saving & uploading duplicate pages/downloads, record them as aliases
+dedup = True
+# block images, fonts, media, iframes & trackers while crawling
+blockResources = True
+# number of crawler processes, each with its own browser; URLs are partitioned by registered domain (1 = single process)
+shards = 1
+# write per-page stage durations (trace.jsonl) & per-host metrics (metrics.prom) to the output directory
+metrics = False
+# scrape links most relevant to the keywords first (anchor text, URL, tier), False keeps discovery order
+bestFirst = True
+# run the browser without window
+headless = False
+# log level: 'DEBUG', 'INFO', 'WARNING' or 'ERROR'
+logLevel = 'INFO'
 # specify if search is required
 useSearch = False
 # limit number of search results
 searchLimit = 30
 
 # main function calling the run scraper function in scraper.py
-async def main(useSearch: bool, keywords: list, topLevelURLs: list, tierLimit: int, totalScrapingLimit: int, scrapingLimit: int, domainLimit: bool, searchLimit: int):
+async def main(useSearch: bool, keywords: list, topLevelURLs: list, tierLimit: int, totalScrapingLimit: int, scrapingLimit: int, domainLimit: bool, searchLimit: int, concurrentSeeds: bool, httpFastPath: bool, outputFormat: str, blockResources: bool, pdfTiers: list, respectRobots: bool, statePath: str, dedup: bool, shards: int, metrics: bool, bestFirst: bool, headless: bool):
     # run search if required
     if useSearch:
         search = SearchClass()
         topLevelURLs = await search.runSearch(keywords, searchLimit)
     
     # run scraper
-    scraper = ScraperClass(tierLimit, totalScrapingLimit, scrapingLimit, domainLimit)
+    scraperArgs = {'tierLimit': tierLimit, 'totalScrapingLimit': totalScrapingLimit, 'scrapingLimit': scrapingLimit, 'domainLimit': domainLimit,
+                   'concurrentSeeds': concurrentSeeds, 'httpFastPath': httpFastPath, 'outputFormat': outputFormat, 'blockResources': blockResources,
+                   'pdfTiers': pdfTiers, 'respectRobots': respectRobots, 'statePath': statePath, 'dedup': dedup, 'metrics': metrics,
+                   'scorer': RelevanceScorerClass(keywords) if bestFirst else None, 'headless': headless}
+    scraper = ShardedScraperClass(shards, **scraperArgs) if shards > 1 else ScraperClass(**scraperArgs)
     directory = await scraper.runScraper(topLevelURLs)
     
     # upload data to blob storage
-    print(directory)
-    await blob.uploadToBlob(directory)  # upload everything also in the container inside the corresponding Azure Storage Account  
+    logging.info("OUTPUT DIRECTORY: %s", directory)
+    await blob.uploadToBlob(directory, metrics=scraper.metrics)  # upload everything also in the container inside the corresponding Azure Storage Account  
+    scraper.metrics.close()
     
-asyncio.run(main(useSearch=useSearch,
-                    keywords=keywords,
-                    topLevelURLs=topLevelURLs,
-                    tierLimit=tierLimit,
-                    totalScrapingLimit=totalScrapingLimit,
-                    scrapingLimit=scrapingLimit,
-                    domainLimit=domainLimit,
-                    searchLimit=searchLimit))
\ No newline at end of file
+# guard required since shard processes are spawned & import this module
+if __name__ == '__main__':
+    configureLogging(logLevel)
+    asyncio.run(main(useSearch=useSearch,
+                        keywords=keywords,
+                        topLevelURLs=topLevelURLs,
+                        tierLimit=tierLimit,
+                        totalScrapingLimit=totalScrapingLimit,
+                        scrapingLimit=scrapingLimit,
+                        domainLimit=domainLimit,
+                        searchLimit=searchLimit,
+                        concurrentSeeds=concurrentSeeds,
+                        httpFastPath=httpFastPath,
+                        outputFormat=outputFormat,
+                        blockResources=blockResources,
+                        pdfTiers=pdfTiers,
+                        respectRobots=respectRobots, statePath=statePath, dedup=dedup, shards=shards, metrics=metrics, bestFirst=bestFirst, headless=headless))
\ No newline at end of file
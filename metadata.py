@@ -0,0 +1,93 @@
+from pathlib import Path
+import json, logging
+
+logger = logging.getLogger(__name__)
+
+class MetadataClass:
+    # initialize metadata store; records are appended to logPath as they arrive (None keeps them in memory only)
+    def __init__(self, logPath: Path = None):
+        # top nodes (topLevelURLs) of the hierarchy
+        self.roots = []
+        # URL -> node index for O(1) attachment of children
+        self.index = {}
+        # children whose parent has not been saved yet, keyed by parent URL
+        self.orphans = {}
+        self.logFile = None
+        # set if the last loaded line was written only partially (crash while writing)
+        self.partialLine = False
+        if logPath is None:
+            return
+        # load records of an existing log first, e.g. when resuming an interrupted crawl
+        if Path(logPath).exists():
+            self.load(logPath)
+        # append-only JSONL log, line buffered so every record is on disk once saved
+        self.logFile = open(logPath, 'a', buffering=1, encoding='utf-8')
+        # terminate a partially written last line so the next record starts on a new line
+        if self.partialLine:
+            self.logFile.write('\n')
+
+    # function saving a single metadata record & attaching it to its parent
+    def add(self, metadata: dict):
+        if self.logFile is not None:
+            self.logFile.write(json.dumps(metadata) + '\n')
+        node = dict(metadata)
+        # URL saved again (e.g. re-scraped after a crash before its frontier state was committed): replace the record in place
+        if node['URL'] in self.index:
+            existing = self.index[node['URL']]
+            children = existing.get('CHILDREN')
+            existing.clear()
+            existing.update(node)
+            if children:
+                existing['CHILDREN'] = children
+            return existing
+        # if top level URL, append as top node
+        if node['PARENT'] is None:
+            self.roots.append(node)
+        # if parent is known, append as child
+        elif node['PARENT'] in self.index:
+            self.index[node['PARENT']].setdefault('CHILDREN', []).append(node)
+        # otherwise wait for parent to be saved
+        else:
+            self.orphans.setdefault(node['PARENT'], []).append(node)
+        self.index[node['URL']] = node
+        # attach children that were saved before this node
+        if node['URL'] in self.orphans:
+            node.setdefault('CHILDREN', []).extend(self.orphans.pop(node['URL']))
+        return node
+
+    # function adding all records of a JSONL log without writing them again
+    def load(self, logPath: Path):
+        with open(logPath, encoding='utf-8') as logFile:
+            for line in logFile:
+                self.partialLine = not line.endswith('\n')
+                # skip empty & partially written lines
+                try:
+                    self.add(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+    # function adding children whose parent was never saved (e.g. failed or interrupted) as top nodes, so no record is lost
+    def adoptOrphans(self):
+        for parent, nodes in self.orphans.items():
+            logger.warning("PARENT NOT SAVED: %s, %d children added as top nodes", parent, len(nodes))
+            self.roots.extend(nodes)
+        self.orphans = {}
+
+    # function writing the nested hierarchy in the metadata.json format
+    def writeTree(self, path: Path):
+        self.adoptOrphans()
+        with open(path, 'w') as metadataFile:
+            json.dump(self.roots, metadataFile, indent=4)
+
+    # function closing the JSONL log
+    def close(self):
+        if self.logFile is not None:
+            self.logFile.close()
+            self.logFile = None
+
+# build nested hierarchy from a JSONL log, e.g. to recover metadata.json after a crash
+def buildTree(logPath: Path):
+    store = MetadataClass()
+    store.load(logPath)
+    store.adoptOrphans()
+    return store.roots
@@ -0,0 +1,201 @@
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from collections import deque
+import asyncio
+import heapq
+import time
+
+# status codes of servers asking us to slow down
+THROTTLESTATUS = (429, 503)
+
+class HostSchedulerClass:
+    # initialize host-aware scheduler; queues URLs per host by score & hands out the best URL respecting per-host concurrency & delay
+    def __init__(self, minDelay: float = 0.25, initialConcurrency: int = 2, maxConcurrency: int = 8, maxDelay: float = 30.0):
+        # minimum delay in seconds between two requests to the same host
+        self.MINDELAY = minDelay
+        # concurrent requests per host at the start
+        self.INITIALCONCURRENCY = initialConcurrency
+        # upper bound of concurrent requests per host
+        self.MAXCONCURRENCY = maxConcurrency
+        # upper bound of the delay after throttling
+        self.MAXDELAY = maxDelay
+        # weight of the newest latency in the moving average
+        self.ALPHA = 0.2
+        # state per host: queued URLs, active requests, concurrency limit, delay & latency statistics
+        self.hosts = {}
+        # hosts with queued URLs, hosts whose best URLs have the same score take turns
+        self.pending = deque()
+        # insertion counter keeping URLs with the same score in FIFO order
+        self.sequence = 0
+        # delay reservation per handed out URL (by id): next request time before & after it was handed out
+        self.reservations = {}
+        # set whenever a URL is added or a slot is released
+        self.changed = asyncio.Event()
+        # number of URLs put but not yet marked as done (like asyncio.Queue)
+        self.unfinished = 0
+        self.finished = asyncio.Event()
+        self.finished.set()
+
+    # function getting (or creating) the state of the host of a URL
+    def hostState(self, url: str):
+        host = (urlsplit(url).hostname or '').lower()
+        if host not in self.hosts:
+            self.hosts[host] = {'HOST': host, 'QUEUE': [], 'ACTIVE': 0, 'LIMIT': float(self.INITIALCONCURRENCY),
+                                'DELAY': self.MINDELAY, 'BASEDELAY': self.MINDELAY, 'NEXT': 0.0,
+                                'LATENCY': None, 'MINLATENCY': None, 'PAGES': 0, 'ERRORS': 0, 'THROTTLED': 0}
+        return self.hosts[host]
+
+    # function adding a URL to the queue of its host; URLs with a higher 'SCORE' are handed out first (default 0)
+    def put_nowait(self, urlDict: dict):
+        state = self.hostState(urlDict['URL'])
+        if not state['QUEUE']:
+            self.pending.append(state['HOST'])
+        # heap per host ordered by score (highest first), then insertion order
+        heapq.heappush(state['QUEUE'], (-urlDict.get('SCORE', 0.0), self.sequence, urlDict))
+        self.sequence += 1
+        self.unfinished += 1
+        self.finished.clear()
+        self.changed.set()
+
+    async def put(self, urlDict: dict):
+        self.put_nowait(urlDict)
+
+    # function waiting for the best scored URL whose host has a free slot & whose delay has passed
+    async def get(self):
+        while True:
+            self.changed.clear()
+            now = time.monotonic()
+            wait = None
+            best = None
+            # best-first over hosts that can take a request now, so slow hosts don't block fast ones
+            for host in self.pending:
+                state = self.hosts[host]
+                if state['ACTIVE'] >= int(state['LIMIT']):
+                    continue
+                if state['NEXT'] > now:
+                    wait = state['NEXT'] - now if wait is None else min(wait, state['NEXT'] - now)
+                    continue
+                if best is None or state['QUEUE'][0][0] < best['QUEUE'][0][0]:
+                    best = state
+            if best is not None:
+                state = best
+                host = state['HOST']
+                urlDict = heapq.heappop(state['QUEUE'])[2]
+                # host moves to the end, so hosts with equally scored URLs take turns
+                self.pending.remove(host)
+                if state['QUEUE']:
+                    self.pending.append(host)
+                state['ACTIVE'] += 1
+                self.reservations[id(urlDict)] = (state['NEXT'], now + state['DELAY'])
+                state['NEXT'] = now + state['DELAY']
+                return urlDict
+            # sleep until a delay passes, a URL is added or a slot is released
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    # function releasing the slot of a URL; status None means no request was sent (e.g. skipped URL)
+    def release(self, urlDict: dict, latency: float, status: int = None):
+        state = self.hostState(urlDict['URL'])
+        state['ACTIVE'] -= 1
+        self.changed.set()
+        previousNext, reservedNext = self.reservations.pop(id(urlDict), (None, None))
+        if status is None:
+            # give the unused delay back, unless another URL of the host was handed out since (its delay must stay)
+            if reservedNext is not None and state['NEXT'] == reservedNext:
+                state['NEXT'] = previousNext
+            return
+        state['PAGES'] += 1
+        if status in THROTTLESTATUS:
+            # server asks to slow down: halve concurrency & double delay
+            state['THROTTLED'] += 1
+            state['LIMIT'] = max(1.0, state['LIMIT'] / 2)
+            state['DELAY'] = min(self.MAXDELAY, state['DELAY'] * 2)
+            state['NEXT'] = time.monotonic() + state['DELAY']
+            return
+        if status == 0 or status >= 500:
+            # failed request: multiplicative decrease
+            state['ERRORS'] += 1
+            state['LIMIT'] = max(1.0, state['LIMIT'] / 2)
+            return
+        # update latency statistics
+        state['MINLATENCY'] = latency if state['MINLATENCY'] is None else min(state['MINLATENCY'], latency)
+        state['LATENCY'] = latency if state['LATENCY'] is None else self.ALPHA * latency + (1 - self.ALPHA) * state['LATENCY']
+        if state['LATENCY'] > 3 * state['MINLATENCY'] and state['LATENCY'] > 1.0:
+            # host is getting slower under load: multiplicative decrease
+            state['LIMIT'] = max(1.0, state['LIMIT'] / 2)
+        else:
+            # host keeps up: additive increase (about one slot per window) & recover delay after throttling
+            state['LIMIT'] = min(float(self.MAXCONCURRENCY), state['LIMIT'] + 1 / state['LIMIT'])
+            state['DELAY'] = max(state['BASEDELAY'], state['DELAY'] * 0.9)
+
+    # function setting the minimum delay of a host, e.g. from the crawl-delay in robots.txt
+    def setDelay(self, url: str, delay: float):
+        state = self.hostState(url)
+        state['BASEDELAY'] = max(self.MINDELAY, delay)
+        state['DELAY'] = max(state['DELAY'], state['BASEDELAY'])
+
+    def task_done(self):
+        self.unfinished -= 1
+        if self.unfinished <= 0:
+            self.finished.set()
+
+    async def join(self):
+        await self.finished.wait()
+
+    def qsize(self):
+        return sum(len(self.hosts[host]['QUEUE']) for host in self.pending)
+
+    def empty(self):
+        return not self.pending
+
+    # function getting number of queued URLs per host
+    def queueDepths(self):
+        return {host: len(state['QUEUE']) for host, state in self.hosts.items()}
+
+    # function summarizing per-host statistics
+    def report(self):
+        return {host: {'PAGES': state['PAGES'], 'ERRORS': state['ERRORS'], 'THROTTLED': state['THROTTLED'],
+                       'LIMIT': round(state['LIMIT'], 2), 'DELAY': round(state['DELAY'], 2)}
+                for host, state in self.hosts.items() if state['PAGES']}
+
+class RobotsClass:
+    # initialize robots.txt cache
+    def __init__(self, userAgent: str = '*'):
+        self.userAgent = userAgent
+        # parsed robots.txt (or pending fetch) per scheme & host
+        self.cache = {}
+
+    # function checking if a URL may be crawled; fetches robots.txt of the host once
+    async def allowed(self, session, url: str):
+        parser = await self.parser(session, url)
+        return parser.can_fetch(self.userAgent, url)
+
+    # function getting the crawl-delay of the host of a URL in seconds (0 if none is set)
+    async def crawlDelay(self, session, url: str):
+        parser = await self.parser(session, url)
+        return float(parser.crawl_delay(self.userAgent) or 0)
+
+    # function getting the parsed robots.txt of the host of a URL; concurrent callers share one fetch
+    async def parser(self, session, url: str):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        if origin not in self.cache:
+            self.cache[origin] = asyncio.ensure_future(self.fetch(session, origin))
+        return await self.cache[origin]
+
+    # function fetching & parsing robots.txt; missing or unreachable files allow everything
+    async def fetch(self, session, origin: str):
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            async with session.get(f"{origin}/robots.txt") as response:
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif response.status >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse((await response.text(errors='replace')).splitlines())
+        except Exception:
+            parser.allow_all = True
+        return parser
@@ -0,0 +1,117 @@
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+import time
+
+# resolves with true once neither the DOM nor the network changed for `quiet` ms, with false after `timeout` ms at the latest
+QUIETSCRIPT = """({quiet, timeout}) => new Promise(resolve => {
+    const start = performance.now();
+    let last = start;
+    const touch = () => { last = performance.now(); };
+    const mutationObserver = new MutationObserver(touch);
+    mutationObserver.observe(document, {subtree: true, childList: true, characterData: true});
+    let performanceObserver = null;
+    try {
+        performanceObserver = new PerformanceObserver(touch);
+        performanceObserver.observe({type: 'resource'});
+    } catch (e) {}
+    const timer = setInterval(() => {
+        const now = performance.now();
+        const settled = now - last >= quiet;
+        if (settled || now - start >= timeout) {
+            clearInterval(timer);
+            mutationObserver.disconnect();
+            if (performanceObserver) performanceObserver.disconnect();
+            resolve(settled);
+        }
+    }, 50);
+})"""
+
+class ReadinessClass:
+    # initialize readiness strategy; times in seconds
+    def __init__(self, maxWait: float = 10.0, quietTime: float = 0.5, minQuietTime: float = 0.1, maxQuietWait: float = 1.5):
+        # hard ceiling for waiting on a single page
+        self.MAXWAIT = maxWait
+        # ceiling for waiting on DOM & network to settle after the load event (tickers, polling, ads never settle)
+        self.MAXQUIETWAIT = maxQuietWait
+        # quiet window for sites without statistics or with slow pages
+        self.QUIETTIME = quietTime
+        # quiet window for sites known to be ready quickly
+        self.MINQUIETTIME = minQuietTime
+        # weight of the newest page in the moving average
+        self.ALPHA = 0.3
+        # readiness statistics per domain: number of pages & moving average of ready time
+        self.stats = {}
+        # quiet phase statistics per domain: number of quiet phases & moving share of pages not settling within MAXQUIETWAIT
+        self.quietStats = {}
+        # pages of a domain are ready at the load event once this share of at least MINQUIETSAMPLES pages did not settle
+        self.UNSETTLEDSHARE = 0.5
+        self.MINQUIETSAMPLES = 3
+        # every n-th page of such a domain still waits for the quiet phase, so the share adapts if the domain changes
+        self.PROBEINTERVAL = 10
+
+    # function waiting until a page is ready; start is the time navigation started; returns ready time
+    async def waitForReady(self, page: Page, domain: str, start: float):
+        ceiling, quiet = self.budget(domain)
+        deadline = start + ceiling
+        # wait for load event, bounded by the ceiling
+        try:
+            await page.wait_for_load_state('load', timeout=max(deadline - time.monotonic(), 0.001) * 1000)
+        except PlaywrightTimeoutError:
+            pass
+        readyTime = time.monotonic() - start
+        # wait for DOM mutations & network requests to settle for the rest of the budget, at most MAXQUIETWAIT
+        remaining = min(deadline - time.monotonic(), self.MAXQUIETWAIT)
+        if remaining > 0 and self.waitsForQuiet(domain):
+            settled = await self.waitForQuiet(page, quiet, remaining)
+            if settled is not None:
+                self.updateQuiet(domain, settled)
+            # keep the capped wait of pages not settling out of the average
+            if settled is not False:
+                readyTime = time.monotonic() - start
+        self.update(domain, readyTime)
+        return readyTime
+
+    # function waiting until neither DOM nor network changed for quiet seconds (at most timeout seconds); False if it did not settle
+    async def waitForQuiet(self, page: Page, quiet: float, timeout: float):
+        try:
+            return await page.evaluate(QUIETSCRIPT, {'quiet': quiet * 1000, 'timeout': timeout * 1000})
+        except Exception:
+            # page navigated or closed while waiting
+            return None
+
+    # function checking if pages of a domain are waited for to settle; False for domains whose pages mostly don't settle
+    def waitsForQuiet(self, domain: str):
+        stats = self.quietStats.get(domain)
+        if stats is None or stats['PAGES'] < self.MINQUIETSAMPLES or stats['UNSETTLED'] < self.UNSETTLEDSHARE:
+            return True
+        stats['SKIPPED'] += 1
+        return stats['SKIPPED'] % self.PROBEINTERVAL == 0
+
+    # function updating the quiet phase statistics of a domain
+    def updateQuiet(self, domain: str, settled: bool):
+        unsettled = 0.0 if settled else 1.0
+        if domain not in self.quietStats:
+            self.quietStats[domain] = {'PAGES': 1, 'UNSETTLED': unsettled, 'SKIPPED': 0}
+        else:
+            stats = self.quietStats[domain]
+            stats['PAGES'] += 1
+            stats['UNSETTLED'] = self.ALPHA * unsettled + (1 - self.ALPHA) * stats['UNSETTLED']
+
+    # function deriving ceiling & quiet window for a domain from its statistics
+    def budget(self, domain: str):
+        if domain not in self.stats:
+            return self.MAXWAIT, self.QUIETTIME
+        average = self.stats[domain]['AVERAGE']
+        # allow slower pages than usual, but never more than the hard ceiling
+        ceiling = min(self.MAXWAIT, max(1.0, 3 * average))
+        # static sites settle quickly, SPAs need a longer quiet window
+        quiet = self.MINQUIETTIME if average < 1.0 else self.QUIETTIME
+        return ceiling, quiet
+
+    # function updating statistics of a domain with the ready time of a page
+    def update(self, domain: str, readyTime: float):
+        if domain not in self.stats:
+            self.stats[domain] = {'PAGES': 1, 'AVERAGE': readyTime}
+        else:
+            stats = self.stats[domain]
+            stats['PAGES'] += 1
+            stats['AVERAGE'] = self.ALPHA * readyTime + (1 - self.ALPHA) * stats['AVERAGE']
@@ -0,0 +1,58 @@
+from urllib.parse import urlsplit, unquote
+import re
+
+# tokens of navigation, account, legal & sharing links that rarely lead to content
+BOILERPLATETOKENS = set([
+    'login', 'logout', 'signin', 'signup', 'register', 'account', 'password', 'cart', 'checkout', 'basket', 'subscribe',
+    'newsletter', 'privacy', 'terms', 'legal', 'imprint', 'impressum', 'cookie', 'cookies', 'disclaimer', 'accessibility',
+    'contact', 'careers', 'jobs', 'share', 'sharer', 'print', 'feed', 'rss', 'sitemap', 'tag', 'tags', 'author', 'calendar',
+])
+# file extensions of documents (papers, reports, presentations)
+DOCUMENTEXTENSIONS = ('.pdf', '.doc', '.docx', '.ppt', '.pptx', '.xls', '.xlsx', '.csv', '.txt', '.epub')
+# words ignored in keywords, anchors & URLs
+STOPWORDS = set(['a', 'an', 'and', 'the', 'of', 'in', 'on', 'for', 'to', 'with', 'by', 'at', 'from', 'or', 'is', 'are',
+                 'www', 'http', 'https', 'com', 'org', 'net', 'html', 'htm', 'php', 'aspx', 'index'])
+
+# split text into lower case word tokens without stop words; trailing plural 's' is removed so 'papers' matches 'paper'
+def tokenize(text: str):
+    tokens = set()
+    for token in re.findall(r'[a-z0-9]+', text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        tokens.add(token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token)
+    return tokens
+
+class RelevanceScorerClass:
+    # initialize link scorer; keywords are the comma separated search keywords passed to main.main
+    def __init__(self, keywords: str = '', anchorWeight: float = 3.0, urlWeight: float = 2.0, tierWeight: float = 0.5,
+                 documentBonus: float = 1.0, boilerplatePenalty: float = 2.0):
+        # token set per keyword phrase
+        phrases = keywords.split(',') if isinstance(keywords, str) else keywords
+        self.phrases = [tokens for tokens in (tokenize(phrase) for phrase in phrases) if tokens]
+        # weight of keyword similarity of anchor text & URL
+        self.ANCHORWEIGHT = anchorWeight
+        self.URLWEIGHT = urlWeight
+        # penalty per tier, deeper links are less likely to be relevant
+        self.TIERWEIGHT = tierWeight
+        # bonus for links to documents & penalty for navigation/legal links
+        self.DOCUMENTBONUS = documentBonus
+        self.BOILERPLATEPENALTY = boilerplatePenalty
+
+    # function scoring a link; higher scores are scraped first
+    def score(self, url: str, anchor: str, tier: int):
+        anchorTokens = tokenize(anchor)
+        splitURL = urlsplit(url)
+        path = unquote(splitURL.path).lower()
+        urlTokens = tokenize(path + ' ' + unquote(splitURL.query))
+        score = self.ANCHORWEIGHT * self.similarity(anchorTokens) + self.URLWEIGHT * self.similarity(urlTokens) - self.TIERWEIGHT * tier
+        if path.endswith(DOCUMENTEXTENSIONS):
+            score += self.DOCUMENTBONUS
+        if (anchorTokens | urlTokens) & BOILERPLATETOKENS:
+            score -= self.BOILERPLATEPENALTY
+        return score
+
+    # function getting the largest share of a keyword phrase contained in the tokens of a link (0 to 1)
+    def similarity(self, tokens: set):
+        if not tokens:
+            return 0.0
+        return max((len(phrase & tokens) / len(phrase) for phrase in self.phrases), default=0.0)
@@ -0,0 +1,111 @@
+from playwright.async_api import Page, Route
+from urllib.parse import urlsplit
+from collections import Counter
+from linkfilter import extractHost
+
+# tracker & ad network domains blocked in every profile
+BLOCKEDDOMAINS = set([
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com", "googletagmanager.com",
+    "googletagservices.com", "adservice.google.com", "connect.facebook.net", "facebook.net", "amazon-adsystem.com",
+    "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "scorecardresearch.com", "quantserve.com",
+    "hotjar.com", "clarity.ms", "bat.bing.com", "ads.linkedin.com", "snap.licdn.com", "analytics.twitter.com",
+    "static.ads-twitter.com", "pubmatic.com", "rubiconproject.com", "openx.net", "casalemedia.com", "moatads.com",
+    "mixpanel.com", "segment.io", "segment.com", "newrelic.com", "nr-data.net", "chartbeat.com", "chartbeat.net",
+])
+
+# resource policies: blocked resource types, whether iframes & trackers are blocked & whether requests are intercepted
+PROFILES = {
+    # link discovery only needs the DOM; requests are intercepted (page.route), which turns off the browser cache of the page
+    'crawl': {'TYPES': set(['image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest', 'websocket', 'eventsource']),
+              'SUBFRAMES': True, 'TRACKERS': True, 'INTERCEPT': True},
+    # PDF renders keep images, fonts & styles so the page looks right; only URL patterns are blocked (CDP, no interception),
+    # so styles, scripts & images shared by the pages of a site come from the browser cache
+    'render': {'TYPES': set(['media']), 'SUBFRAMES': False, 'TRACKERS': True, 'INTERCEPT': False},
+}
+
+# URL patterns of resource types blocked without interception
+TYPEPATTERNS = {
+    'media': ['*.mp4', '*.mp4?*', '*.webm', '*.webm?*', '*.m3u8', '*.m3u8?*', '*.mp3', '*.mp3?*', '*.ogg', '*.ogg?*', '*.mov', '*.mov?*'],
+}
+
+class ResourcePolicyClass:
+    # initialize resource policy; excludedDomains are blocked as embeds too (e.g. YouTube players)
+    def __init__(self, excludedDomains: set, profiles: dict = None, blockedDomains: set = None):
+        self.excludedDomains = excludedDomains
+        self.profiles = profiles if profiles is not None else PROFILES
+        self.blockedDomains = blockedDomains if blockedDomains is not None else BLOCKEDDOMAINS
+        # number of blocked requests per resource type
+        self.blockedRequests = Counter()
+        # bytes received over the network by browser pages (responses served from the browser cache count 0)
+        self.transferredBytes = 0
+
+    # function preparing a new page: measures received bytes & blocks requests by the profile if block is set
+    async def attach(self, page: Page, profile: str, block: bool = True):
+        cdpSession = await page.context.new_cdp_session(page)
+        cdpSession.on('Network.loadingFinished', self.handleLoadingFinished)
+        cdpSession.on('Network.loadingFailed', self.handleLoadingFailed)
+        await cdpSession.send('Network.enable')
+        if not block:
+            return
+        if self.profiles[profile]['INTERCEPT']:
+            await page.route('**/*', lambda route: self.handleRoute(route, profile))
+        else:
+            await cdpSession.send('Network.setBlockedURLs', {'urls': self.blockedPatterns(profile)})
+
+    # function getting URL patterns blocked by a profile without interception
+    def blockedPatterns(self, profile: str):
+        profile = self.profiles[profile]
+        patterns = [pattern for resourceType in profile['TYPES'] for pattern in TYPEPATTERNS.get(resourceType, [])]
+        if profile['TRACKERS']:
+            patterns += [pattern for domain in sorted(self.blockedDomains) for pattern in (f"*://{domain}/*", f"*://*.{domain}/*")]
+            patterns += [pattern for domain in sorted(self.excludedDomains) for pattern in (f"*://{domain}.*/*", f"*://*.{domain}.*/*")]
+        return patterns
+
+    def handleLoadingFinished(self, event: dict):
+        self.transferredBytes += int(event.get('encodedDataLength', 0))
+
+    # requests blocked by URL pattern fail with a blocked reason
+    def handleLoadingFailed(self, event: dict):
+        if event.get('blockedReason') is not None:
+            self.blockedRequests[event.get('type', 'other').lower()] += 1
+
+    # function aborting or continuing a single intercepted request
+    async def handleRoute(self, route: Route, profile: str):
+        request = route.request
+        try:
+            blocked = self.isBlocked(request, profile)
+        except Exception:
+            # e.g. requests of service workers without frame
+            blocked = False
+        if blocked:
+            self.blockedRequests[request.resource_type] += 1
+            await route.abort('blockedbyclient')
+        else:
+            await route.continue_()
+
+    # function checking a request against a profile
+    def isBlocked(self, request, profile: str):
+        frame = request.frame
+        # never block the page itself
+        if request.is_navigation_request() and frame.parent_frame is None:
+            return False
+        profile = self.profiles[profile]
+        if request.resource_type in profile['TYPES']:
+            return True
+        # block iframes (ads, embeds, social widgets)
+        if profile['SUBFRAMES'] and request.resource_type == 'document' and frame.parent_frame is not None:
+            return True
+        if profile['TRACKERS']:
+            host = (urlsplit(request.url).hostname or '').lower()
+            if self.isBlockedHost(host) or extractHost(host).domain in self.excludedDomains:
+                return True
+        return False
+
+    # function checking if host or one of its parent domains is blocked
+    def isBlockedHost(self, host: str):
+        parts = host.split('.')
+        return any('.'.join(parts[i:]) in self.blockedDomains for i in range(len(parts) - 1))
+
+    # function summarizing blocked requests & measured bytes received by the browser
+    def report(self):
+        return {'BLOCKED': sum(self.blockedRequests.values()), 'TRANSFERREDBYTES': self.transferredBytes, 'BYTYPE': dict(self.blockedRequests)}
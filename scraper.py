@@ -3,14 +3,66 @@
 import asyncio
 from playwright.async_api import async_playwright, BrowserContext
 from pathlib import Path
-import time, re, hashlib, json, base64
-import tldextract
+import time, re, hashlib, base64, logging, contextlib, contextvars
+from frontier import FrontierClass
+from metadata import MetadataClass
+from fetcher import FetcherClass
+from resources import ResourcePolicyClass
+from readiness import ReadinessClass
+from politeness import HostSchedulerClass, RobotsClass, THROTTLESTATUS
+from crawlstore import CrawlStoreClass
+from dedup import DedupClass, hashFile
+from linkfilter import LinkFilterClass, LINKSCRIPT, registeredDomain, domainName
+from instrumentation import MetricsClass
+
+logger = logging.getLogger(__name__)
+
+# supported formats pages can be saved in
+OUTPUTFORMATS = ('pdf', 'mhtml', 'html', 'text')
+# file extension per output format
+FILEEXTENSIONS = {'pdf': 'pdf', 'mhtml': 'mhtml', 'html': 'html', 'text': 'txt'}
+# network time of the URL scraped by the current worker, the host latency the scheduler adapts to
+NETWORKTIME = contextvars.ContextVar('networkTime', default=None)
+
+# context manager adding the duration of a request until its response to the network time of the current worker
+@contextlib.contextmanager
+def networkTimer():
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        networkTime = NETWORKTIME.get()
+        if networkTime is not None:
+            networkTime[0] += time.monotonic() - start
+
+# finds the first visible element matching the consent texts or selectors & clicks it in a single round trip
+CONSENTSCRIPT = """({texts, selectors}) => {
+    const visible = el => {
+        const rect = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    const buttons = Array.from(document.querySelectorAll('button, [role="button"]')).filter(visible);
+    for (const text of texts) {
+        const match = buttons.find(button => {
+            const label = button.innerText.trim().replace(/\\s+/g, ' ').toLowerCase();
+            return label === text || label.startsWith(text + ' ');
+        });
+        if (match) { match.click(); return 'text=' + text; }
+    }
+    for (const selector of selectors) {
+        let match = null;
+        try { match = Array.from(document.querySelectorAll(selector)).find(visible); } catch (e) { continue; }
+        if (match) { match.click(); return selector; }
+    }
+    return null;
+}"""
 
 class ScraperClass:
     # initialize scraper client
-    def __init__(self, tierLimit: int, totalScrapingLimit: int, scrapingLimit: int, domainLimit: bool):
-        # limit number of concurrent tasks
-        self.semaphore = asyncio.Semaphore(10)
+    def __init__(self, tierLimit: int, totalScrapingLimit: int, scrapingLimit: int, domainLimit: bool, concurrentSeeds: bool = False, httpFastPath: bool = True, outputFormat: str = 'pdf', blockResources: bool = True, pdfTiers: list = None, renderWorkers: int = 4, respectRobots: bool = True, statePath: str = None, dedup: bool = True, outputDir: str = None, metrics: bool = False, scorer=None, headless: bool = False):
+        # number of worker coroutines scraping pages concurrently (per host limits are set by the scheduler)
+        self.WORKERS = 10
         # limit of tiers to be scraped
         self.TIERLIMIT = tierLimit
         # limit total number of links to be scraped
@@ -19,39 +71,75 @@ class ScraperClass:
         self.SCRAPINGLIMIT = scrapingLimit
         # limit scraping to domain of current topLevelURL
         self.DOMAINLIMIT = domainLimit
+        # crawl all topLevelURLs concurrently on one shared browser instead of one after another
+        self.CONCURRENTSEEDS = concurrentSeeds
+        # check content type over plain HTTP before opening a browser tab
+        self.HTTPFASTPATH = httpFastPath
+        # format pages are saved in; html & text pages are fetched without the browser if they are static
+        if outputFormat not in OUTPUTFORMATS:
+            raise ValueError(f"outputFormat must be one of {OUTPUTFORMATS}, got '{outputFormat}'")
+        self.OUTPUTFORMAT = outputFormat
+        # tiers rendered as PDF if outputFormat is 'pdf' (None = all tiers), pages of other tiers are saved as html
+        self.PDFTIERS = set(pdfTiers) if pdfTiers is not None else None
+        # number of pages rendered as PDF concurrently, independent of the scraping workers
+        self.RENDERWORKERS = renderWorkers
+        # skip URLs disallowed by robots.txt & respect its crawl-delay
+        self.RESPECTROBOTS = respectRobots
+        # number of retries of URLs answered with 429/503
+        self.MAXRETRIES = 2
+        # block heavy & third-party resources (images, fonts, media, iframes, trackers) in the browser
+        self.BLOCKRESOURCES = blockResources
+        # on-disk crawl store for resuming interrupted crawls & incremental recrawls (None = in memory only)
+        self.crawlStore = CrawlStoreClass(statePath) if statePath is not None else None
+        # skip saving, rendering & uploading pages/downloads whose content was already scraped under another URL
+        self.DEDUP = dedup
+        self.dedup = DedupClass()
+        # record per-page stage durations & per-host counters to trace.jsonl & metrics.prom in the output directory
+        self.METRICS = metrics
+        # disabled until runScraper knows the output directory
+        self.metrics = MetricsClass()
+        # link scorer with score(url, anchor, tier) (e.g. RelevanceScorerClass); best scored URLs are scraped first, None keeps discovery order
+        self.scorer = scorer
+        # run the browser without window, e.g. on servers & in benchmarks
+        self.HEADLESS = headless
 
-        # create output directory to save scraped data
+        # create output directory to save scraped data (given when crawling in several processes)
         outputTime = time.strftime("%d%m%Y-%H%M%S")
-        self.outputDir = Path(f'./output/{outputTime}/')
+        self.outputDir = Path(outputDir) if outputDir is not None else Path(f'./output/{outputTime}/')
         self.outputDir.mkdir(parents=True, exist_ok=True)
 
-        # queue for URLs to be scraped
-        self.scrapingQueue = asyncio.Queue()
+        # queue for URLs to be scraped, handed out per host with adaptive concurrency & delay
+        self.scrapingQueue = HostSchedulerClass()
+        # robots.txt cache per host
+        self.robots = RobotsClass()
+        # stores fingerprints of URLs already enqueued, updated at enqueue time
+        self.frontier = FrontierClass()
+        # queue for opened pages waiting to be rendered as PDF; bounded so open tabs stay limited
+        self.renderQueue = asyncio.Queue(maxsize=2*renderWorkers)
         # stores already scraped pages
         self.scrapedPages = set()
+        # URLs handed over to the render workers, marked as done once their PDF is saved
+        self.renderingURLs = set()
+        # scraping state (page counter, output directory) per topLevelURL
+        self.seeds = []
+        # number of scraping tasks started across all topLevelURLs
+        self.totalCount = 0
         # stores URLs to be excepted from scraping
         self.excludedDomains = set(["linkedin", "youtube", "twitter", "x", "facebook", "bluesky",])
-        # list for storing scraping hierarchy
-        self.hierarchy = []
-        # common cookie consent button selectors (ordered by specificity)
+        # batched link filter with cached domain extraction
+        self.linkFilter = LinkFilterClass(self.excludedDomains, tierLimit, domainLimit)
+        # request interception policy, also blocks embeds from excludedDomains
+        self.resourcePolicy = ResourcePolicyClass(self.excludedDomains)
+        # store for scraping hierarchy, streamed to metadata.jsonl as pages complete (created per run)
+        self.metadata = None
+        # URLs queued but not scraped by an interrupted run
+        self.resumedURLs = []
+        # common cookie consent button texts, matched case-insensitively against buttons (ordered by specificity)
+        self.consentTexts = [
+            'accept', 'accept all', 'accept cookies', 'agree', 'i agree', 'consent', 'ok', 'got it', 'allow', 'allow all', 'continue',
+        ]
+        # common cookie consent class/ID patterns
         self.consentSelectors = [
-            # Common consent button texts
-            'button:has-text("Accept")',
-            'button:has-text("Accept all")',
-            'button:has-text("Accept All")',
-            'button:has-text("Accept cookies")',
-            'button:has-text("Accept Cookies")',
-            'button:has-text("Agree")',
-            'button:has-text("I agree")',
-            'button:has-text("I Agree")',
-            'button:has-text("Consent")',
-            'button:has-text("OK")',
-            'button:has-text("Got it")',
-            'button:has-text("Allow")',
-            'button:has-text("Allow all")',
-            'button:has-text("Allow All")',
-            'button:has-text("Continue")',
-            # Common class/ID patterns
             '[class*="accept"]',
             '[class*="consent"]',
             '[id*="accept"]',
@@ -64,214 +152,523 @@ class ScraperClass:
             '[aria-label*="Accept"]',
             '[aria-label*="accept"]',
         ]
+        # adaptive page readiness waiting, tuned per domain
+        self.readiness = ReadinessClass()
+        # consent pattern that worked per registered domain, None if the domain shows no banner
+        self.consentCache = {}
 
     # main function coordinating the scraping & auxiliary functions
     async def runScraper(self, topLevelURLs: list):
         start = time.time()
-            
-        # start scraping process for each topLevelURL
-        for url in topLevelURLs:
-            # initialize scrapingQueue with topLevelURL -> tier 0
-            await self.scrapingQueue.put({'URL': url, 'TIER': 0, 'PARENT': None})
-            # create directory within output per topLevelURL to save scraped data
-            domain = tldextract.extract(url).domain
-            urlDirectory = self.outputDir / domain
-            urlDirectory.mkdir(parents=True, exist_ok=True)
-            # starts scraping process
-            await self.scrapePages(urlDirectory)
-            print("Finished scraping", url)
-        
+        if self.crawlStore is not None:
+            run = self.crawlStore.startRun(topLevelURLs, self.outputDir)
+            # continue in the output directory of the interrupted run
+            if run['RESUMED']:
+                # drop the empty directory created for this run, unless it is the one being resumed (given outputDir)
+                if self.outputDir.resolve() != run['OUTPUTDIR'].resolve() and not any(self.outputDir.iterdir()):
+                    self.outputDir.rmdir()
+                self.outputDir = run['OUTPUTDIR']
+                logger.info("RESUMING CRAWL: %s", self.outputDir)
+        # metadata of a resumed run is loaded from its metadata.jsonl
+        self.metadata = MetadataClass(self.outputDir / 'metadata.jsonl')
+        if self.METRICS:
+            self.metrics = MetricsClass(self.outputDir / 'trace.jsonl', self.outputDir / 'metrics.prom')
+            self.metrics.attachQueue(self.scrapingQueue)
+        # create scraping state (page counter, output directory) per topLevelURL
+        self.seeds = [self.createSeed(url, i) for i, url in enumerate(topLevelURLs)]
+        if self.crawlStore is not None and run['RESUMED']:
+            # restore seen set, queued URLs & scraping counters
+            fingerprints, self.resumedURLs, counts = self.crawlStore.loadFrontier()
+            self.frontier.seen.update(fingerprints)
+            for seed in self.seeds:
+                seed['COUNT'] = counts.get(seed['INDEX'], 0)
+            self.totalCount = sum(counts.values())
+
+        if self.CONCURRENTSEEDS:
+            # crawl all topLevelURLs at once on one shared browser
+            await self.scrapePages(self.seeds)
+        else:
+            # start scraping process for each topLevelURL
+            for seed in self.seeds:
+                await self.scrapePages([seed])
+                logger.info("Finished scraping %s", seed['URL'])
+        # order top nodes by topLevelURL so concurrent & sequential runs produce the same metadata
+        seedOrder = {seed['URL']: seed['INDEX'] for seed in self.seeds}
+        self.metadata.roots.sort(key=lambda node: seedOrder.get(node['URL'], len(self.seeds)))
+
         # save metadata as json file
-        with open(self.outputDir / 'metadata.json', 'w') as metadataFile:
-            json.dump(self.hierarchy, metadataFile, indent=4)
+        self.metadata.writeTree(self.outputDir / 'metadata.json')
+        self.metadata.close()
+        if self.crawlStore is not None:
+            self.crawlStore.finishRun()
+            self.crawlStore.close()
+        # metrics stay open for the upload, closed by the caller
+        self.metrics.writeMetrics()
         end = time.time()
-        print("TOTAL SCRAPING TIME:", end-start)
+        logger.info("TOTAL SCRAPING TIME: %.2fs", end-start)
+        report = self.resourcePolicy.report()
+        logger.info("BROWSER RESOURCES: %.1f MB received, %d requests blocked %s", report['TRANSFERREDBYTES']/1e6, report['BLOCKED'], report['BYTYPE'])
         
         # return path to directory to be uploaded to blob storage
         return self.outputDir
+
+    # function creating the scraping state of a single topLevelURL
+    def createSeed(self, url: str, index: int):
+        # create directory within output per topLevelURL to save scraped data
+        domain = domainName(url)
+        urlDirectory = self.outputDir / domain
+        urlDirectory.mkdir(parents=True, exist_ok=True)
+        return {'URL': url, 'INDEX': index, 'DIRECTORY': urlDirectory, 'COUNT': 0}
         
-    # function creating browser & context; calls scrapePage function per URL in scrapinqQueue
-    async def scrapePages(self, directory: Path):
-        async with async_playwright() as plwr:
+    # function creating browser & context; runs worker pool until all given topLevelURLs are crawled
+    async def scrapePages(self, seeds: list):
+        # pooled HTTP client for pre-flight checks, downloads & static pages
+        async with async_playwright() as plwr, FetcherClass() as self.fetcher:
             # create browser & context;
-            browser = await plwr.chromium.launch(headless=False)
+            browser = await plwr.chromium.launch(headless=self.HEADLESS)
             context = await browser.new_context()
-            print('BROWSER CREATED')
-            tasks = []
-            i = 0
-            
-            while True:
-                # stop function if scraping queue is empty & no tasks are running
-                if self.scrapingQueue.empty() and not tasks:
-                    break
-                
-                # start scraping if queue is not empty
-                if not self.scrapingQueue.empty():
-                    # when total scraping limit is reached, stop creating new scraping tasks
-                    if len(self.scrapedPages) >= self.TOTALSCRAPINGLIMIT:
-                        break
-                    if i >= self.SCRAPINGLIMIT:
-                        break
-                    # get URL & tier from scrapingQueue
-                    urlDict = await self.scrapingQueue.get()
-                    url = urlDict['URL']
-                    tier = urlDict['TIER']
-                    parent = urlDict['PARENT']
-                    # acquire semaphore to limit number of concurrent tasks
-                    await self.semaphore.acquire()
-                    # create scraping task
-                    task = asyncio.create_task(self.scrapePage(context, url, tier, directory, parent))
-                    tasks.append(task)
-                    i += 1
-
-                if i % 10 == 0:
-                    print("SCRAPED:", len(self.scrapedPages), "TASKS:", len(tasks))
-                # remove completed tasks from tasks list
-                tasks = [task for task in tasks if not task.done()]
-                # avoid blocking event loop
-                await asyncio.sleep(0)
-        
-            # wait for all concurrent tasks to be completed
-            await asyncio.gather(*tasks)
+            logger.info('BROWSER CREATED')
+            # initialize scrapingQueue with topLevelURLs -> tier 0
+            for seed in seeds:
+                self.enqueueURL({'URL': seed['URL'], 'TIER': 0, 'PARENT': None, 'SEED': seed['INDEX']})
+            # add URLs left in the queue by an interrupted run
+            seedIndices = set(seed['INDEX'] for seed in seeds)
+            for urlDict in self.resumedURLs:
+                if urlDict['SEED'] in seedIndices:
+                    # anchor texts are not stored, URLs are scored by URL & tier only
+                    self.scrapingQueue.put_nowait({**urlDict, 'SCORE': self.scoreLink(urlDict['URL'], '', urlDict['TIER'])})
+            # start long-lived workers sharing the scrapingQueue & separate PDF render workers
+            workers = [asyncio.create_task(self.scrapeWorker(context)) for _ in range(self.WORKERS)]
+            workers += [asyncio.create_task(self.renderWorker()) for _ in range(self.RENDERWORKERS)]
+            # wait until every queued URL is either scraped or skipped, then until all renders are done
+            await self.waitUntilCrawled()
+            await self.renderQueue.join()
+            # stop idle workers
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
             # close context & browser after all tasks are completed
             await context.close()
             await browser.close()
-            print(f'\nSCRAPING COMPLETED\n{len(self.scrapedPages)} PAGES SCRAPED')
+            logger.info('SCRAPING COMPLETED: %d PAGES SCRAPED', len(self.scrapedPages))
+            logger.info("HOSTS: %s", self.scrapingQueue.report())
+
+    # function waiting until the crawl is completed
+    async def waitUntilCrawled(self):
+        await self.scrapingQueue.join()
+
+    # worker function pulling URLs from scrapingQueue until cancelled
+    async def scrapeWorker(self, context: BrowserContext):
+        while True:
+            urlDict = await self.scrapingQueue.get()
+            # HTTP status of the page, None if no request was sent
+            status = None
+            # time spent waiting for the host (not for readiness, consent, dedup or rendering)
+            networkTime = [0.0]
+            NETWORKTIME.set(networkTime)
+            trace = self.metrics.startPage(urlDict['URL'], urlDict['TIER'])
+            try:
+                url = urlDict['URL']
+                seed = self.seeds[urlDict['SEED']]
+                # skip URL once total or per topLevelURL scraping limit is reached; drains the queue
+                if not self.claimPage(seed):
+                    self.finishURL(url, 'skipped')
+                    continue
+                if self.RESPECTROBOTS:
+                    # skip URLs disallowed by robots.txt
+                    with self.metrics.stage('robots'):
+                        allowed = await self.robots.allowed(self.fetcher.session, url)
+                        if allowed:
+                            self.scrapingQueue.setDelay(url, await self.robots.crawlDelay(self.fetcher.session, url))
+                    if not allowed:
+                        logger.info("DISALLOWED BY ROBOTS.TXT: %s", url)
+                        self.releasePage(seed)
+                        self.finishURL(url, 'skipped')
+                        continue
+                if self.totalCount % 10 == 0:
+                    logger.info("SCRAPED: %d QUEUED: %d", len(self.scrapedPages), self.scrapingQueue.qsize())
+                status = await self.scrapePage(context, url, urlDict['TIER'], urlDict['PARENT'], seed)
+                # retry throttled URLs later without using up the scraping limits
+                if status in THROTTLESTATUS and urlDict.get('RETRIES', 0) < self.MAXRETRIES:
+                    logger.warning("THROTTLED (%s): %s", status, url)
+                    self.releasePage(seed)
+                    self.scrapingQueue.put_nowait({**urlDict, 'RETRIES': urlDict.get('RETRIES', 0) + 1})
+                # pages waiting for their PDF are marked as done by the render workers
+                elif url not in self.renderingURLs:
+                    self.finishURL(url, 'done')
+            finally:
+                # adapt concurrency & delay of the host, mark queue item as processed so scrapingQueue.join() can return
+                self.scrapingQueue.release(urlDict, networkTime[0], status)
+                self.metrics.finishPage(trace, status)
+                self.scrapingQueue.task_done()
+
+    # function counting a page against the total & per topLevelURL scraping limits; False if a limit is reached
+    def claimPage(self, seed: dict):
+        if self.totalCount >= self.TOTALSCRAPINGLIMIT or seed['COUNT'] >= self.SCRAPINGLIMIT:
+            return False
+        seed['COUNT'] += 1
+        self.totalCount += 1
+        return True
+
+    # function giving back a claimed page, e.g. for URLs retried later
+    def releasePage(self, seed: dict):
+        seed['COUNT'] -= 1
+        self.totalCount -= 1
 
-    # function scraping a single page
-    async def scrapePage(self, context: BrowserContext, url: str, tier: int, directory: Path, parent: str):
+    # function adding a URL to scrapingQueue (& crawl store) unless it was already queued
+    def enqueueURL(self, urlDict: dict):
+        if not self.frontier.add(urlDict['URL']):
+            return False
+        if self.crawlStore is not None:
+            self.crawlStore.enqueue(urlDict, self.frontier.fingerprint(urlDict['URL']))
+        self.scrapingQueue.put_nowait(urlDict)
+        return True
+
+    # function marking a URL as 'done' or 'skipped' in the crawl store
+    def finishURL(self, url: str, state: str):
+        if self.crawlStore is not None:
+            self.crawlStore.finish(self.frontier.fingerprint(url), state)
+
+    # function saving result & validators of a scraped URL in the crawl store for incremental recrawls
+    def saveResult(self, url: str, metadata: dict, links: list, etag: str = None, lastModified: str = None, contentHash: str = None):
+        if self.crawlStore is not None:
+            self.crawlStore.saveResult(url, metadata, links, etag, lastModified, contentHash, self.outputDir)
+
+    # function saving a duplicate as alias of the canonical page/download (no file is saved for it)
+    def saveAlias(self, canonical: dict, metadata: dict):
+        logger.info("DUPLICATE: %s -> %s", metadata['URL'], canonical['URL'])
+        self.saveMetadata({**metadata, 'ALIASOF': canonical['ID'], 'CANONICAL': canonical['URL']})
+
+    # function scraping a single page; routes URL to the cheapest handler based on its content type; returns HTTP status (0 on error)
+    async def scrapePage(self, context: BrowserContext, url: str, tier: int, parent: str, seed: dict):
         try:
-            # create new browser page (tab)
+            if self.HTTPFASTPATH:
+                # result of a previous run, sent as conditional request for incremental recrawls
+                previous = self.crawlStore.result(url) if self.crawlStore is not None else None
+                with self.metrics.stage('preflight'), networkTimer():
+                    info = await self.fetcher.preflight(url, self.crawlStore.conditionalHeaders(previous) if previous is not None else None)
+                # server asks to slow down, retry later
+                if info is not None and info['STATUS'] in THROTTLESTATUS:
+                    return info['STATUS']
+                # URL did not change since the previous run, skip rendering & upload
+                if info is not None and info['STATUS'] == 304 and previous is not None:
+                    return await self.scrapeUnchanged(previous, url, tier, parent, seed)
+                # non-HTML content is streamed straight to disk
+                if info is not None and not info['HTML']:
+                    return await self.scrapeDownload(info, url, tier, parent, seed, previous)
+                # static HTML pages are handled without the browser if neither PDF nor MHTML is needed
+                if info is not None and self.pageFormat(tier) in ('html', 'text'):
+                    status = await self.scrapeStatic(url, tier, parent, seed, previous)
+                    if status is not None:
+                        return status
+            # pages needing JavaScript rendering or PDF output are opened in the browser
+            return await self.scrapeBrowser(context, url, tier, parent, seed)
+        except Exception as e:
+            logger.error("ERROR WHILE SCRAPING %s: %s", url, e)
+            # HTTP errors keep their status code
+            return getattr(e, 'status', 0)
+
+    # function handling a URL unchanged since a previous run: re-queues its links & references the previous output
+    async def scrapeUnchanged(self, previous: dict, url: str, tier: int, parent: str, seed: dict):
+        logger.info("UNCHANGED: %s", url)
+        self.scrapedPages.add(url)
+        # insert links of the previous run into crawlingQueue, they may have changed
+        self.checkLinks(previous['LINKS'], tier+1, url, seed)
+        # construct metadata dictionary pointing to the run holding the file & save metadata
+        unchangedData = {**previous['METADATA'], 'TIMESTAMP': int(time.time()), 'TIER': tier, 'PARENT': parent, 'UNCHANGED': True, 'RUN': Path(previous['OUTPUTDIR']).name}
+        self.saveMetadata(unchangedData)
+        return 304
+
+    # function downloading non-HTML content over HTTP
+    async def scrapeDownload(self, info: dict, url: str, tier: int, parent: str, seed: dict, previous: dict = None):
+        filename = info['FILENAME']
+        # generate hash as ID for download
+        hashValue = self.generateHash(info['URL']+filename, 16)
+        # stream download to disk
+        downloadPath = seed['DIRECTORY'] / 'downloads' / f"{hashValue}_{filename}"
+        with self.metrics.stage('download'):
+            result = await self.fetcher.download(url, downloadPath)
+        if result is None:
+            return info['STATUS']
+        self.metrics.addBytes(result['SIZE'])
+        # same content as in the previous run (server without validators), drop the copy
+        if previous is not None and previous['CONTENTHASH'] == result['SHA256']:
+            downloadPath.unlink()
+            return await self.scrapeUnchanged(previous, url, tier, parent, seed)
+        # add URL to set of scraped pages after successful download
+        self.scrapedPages.add(url)
+        # construct metadata dictionary & save metadata
+        downloadData = {'ID': hashValue, 'TIMESTAMP': int(time.time()), 'TYPE': 'download', 'URL': url, 'TIER': tier, 'TITLE': filename, 'PARENT': parent, 'SHA256': result['SHA256']}
+        # same bytes already downloaded from another URL, drop the copy
+        canonical = self.dedup.checkBytes(result['SHA256'], {'ID': hashValue, 'URL': url}) if self.DEDUP else None
+        if canonical is not None:
+            downloadPath.unlink()
+            self.saveAlias(canonical, downloadData)
+            return info['STATUS']
+        logger.info("DOWNLOAD SAVED: %s", filename)
+        self.saveMetadata(downloadData)
+        self.saveResult(url, downloadData, [], info['ETAG'], info['LASTMODIFIED'], result['SHA256'])
+        return info['STATUS']
+
+    # function scraping a static HTML page over HTTP; returns HTTP status, None if the page needs a browser
+    async def scrapeStatic(self, url: str, tier: int, parent: str, seed: dict, previous: dict = None):
+        with self.metrics.stage('fetch'), networkTimer():
+            page = await self.fetcher.fetchHTML(url)
+        if self.fetcher.needsRendering(page):
+            return None
+        # same content as in the previous run (server without validators), skip saving
+        html = page['HTML'].encode()
+        self.metrics.addBytes(len(html))
+        contentHash = hashlib.sha256(html).hexdigest()
+        if previous is not None and previous['CONTENTHASH'] == contentHash:
+            return await self.scrapeUnchanged(previous, url, tier, parent, seed)
+        title = page['TITLE']
+        # generate hash as ID for page
+        hashValue = self.generateHash(url+title, 16)
+        # same text already scraped under another URL (exact or near-duplicate)
+        with self.metrics.stage('dedup'):
+            canonical = self.dedup.checkText(page['TEXT'], {'ID': hashValue, 'URL': url}) if self.DEDUP else None
+        if canonical is None:
+            # save page as html or extracted text
+            outputFormat = self.pageFormat(tier)
+            content = page['TEXT'] if outputFormat == 'text' else page['HTML']
+            pagePath = seed['DIRECTORY'] / f"{hashValue}.{FILEEXTENSIONS[outputFormat]}"
+            pagePath.write_text(content, encoding='utf-8')
+        # add URL to set of scraped pages after successful scraping
+        self.scrapedPages.add(url)
+        # insert links into crawlingQueue
+        self.checkLinks(page['LINKS'], tier+1, url, seed, page['ANCHORS'])
+        # construct metadata dictionary & save metadata
+        pageData = {'ID': hashValue, 'TIMESTAMP': int(time.time()), 'TYPE': 'page', 'URL': url, 'TIER': tier, 'TITLE': title, 'PARENT': parent}
+        if canonical is not None:
+            self.saveAlias(canonical, pageData)
+            return page['STATUS']
+        self.saveMetadata(pageData)
+        self.saveResult(url, pageData, page['LINKS'], page['ETAG'], page['LASTMODIFIED'], contentHash)
+        return page['STATUS']
+
+    # function scraping a single page in the browser; returns HTTP status
+    async def scrapeBrowser(self, context: BrowserContext, url: str, tier: int, parent: str, seed: dict):
+        # output directory of the topLevelURL this page belongs to
+        directory = seed['DIRECTORY']
+        outputFormat = self.pageFormat(tier)
+        # create new browser page (tab)
+        with self.metrics.stage('newpage'):
             page = await context.new_page()
-            
-            # try block for scraping and handling file downloads if navigation to URL fails
+        # set if the page is handed over to the render workers, which close it
+        rendering = False
+        # status of downloads & pages without response (e.g. about:blank)
+        status = 200
+        
+        try:
+            # pages rendered as PDF or MHTML keep images, fonts & styles
+            await self.resourcePolicy.attach(page, 'render' if outputFormat in ('pdf', 'mhtml') else 'crawl', self.BLOCKRESOURCES)
+            # open URL
+            start = time.monotonic()
             try:
-                # open URL
-                await page.goto(url)
-                # wait for page to load properly
-                await asyncio.sleep(0.5)
-                # dismiss cookie consent banners if present
-                await self.dismissCookieConsent(page)
-                # additional wait after dismissing consent
-                await asyncio.sleep(0.3)
-                # get title & duplicate free lists for links & texts
-                linkLocator = page.locator('a')
-                #textLocator = page.locator('p, h1, h2, h3, h4, h5, h6, span, div')
-                links = await linkLocator.evaluate_all('anchors => { const seen = new Set(); return anchors.map(anchor => anchor.href).filter(href => href.length > 0 && !seen.has(href) && seen.add(href)); }')
-                #texts = await textLocator.evaluate_all('elements => { const seen = new Set(); return elements.map(element => element.textContent.trim()).filter(text => text.length > 0 && !seen.has(text) && seen.add(text)); }')
-                title = await page.title()
-                #html = await page.content()
-                # generate hash as ID for page
-                hashValue = self.generateHash(url+title, 16)
-                # save page as pdf
-                await page.emulate_media(media="screen")
-                await page.pdf(path=f"{directory}/{hashValue}.pdf", landscape=False, scale=0.7)
+                with self.metrics.stage('goto'), networkTimer():
+                    response = await page.goto(url, wait_until='domcontentloaded')
+            # if navigation fails, handle as file download (only navigation errors, other errors are scraping errors)
+            except Exception as e:
+                logger.info("DOWNLOAD DETECTED: %s %s", url, e)
+                await self.scrapeBrowserDownload(page, url, tier, parent, directory)
+                return status
+            # validators for conditional requests of incremental recrawls
+            etag, lastModified = None, None
+            if response is not None:
+                status = response.status
+                etag, lastModified = response.headers.get('etag'), response.headers.get('last-modified')
+            # server asks to slow down, retry later
+            if status in THROTTLESTATUS:
+                return status
+            # wait until load event fired & DOM and network are quiet (bounded, tuned per domain)
+            with self.metrics.stage('ready'):
+                readyTime = await self.readiness.waitForReady(page, registeredDomain(url), start)
+            # dismiss cookie consent banners if present
+            with self.metrics.stage('consent'):
+                await self.dismissCookieConsent(page, url)
+            # get title & duplicate free lists for links & texts
+            linkLocator = page.locator('a')
+            #textLocator = page.locator('p, h1, h2, h3, h4, h5, h6, span, div')
+            # first filtering step (http(s) only, no fragments, no duplicates) happens in the page
+            with self.metrics.stage('links'):
+                anchors = dict(await linkLocator.evaluate_all(LINKSCRIPT))
+            links = list(anchors)
+            #texts = await textLocator.evaluate_all('elements => { const seen = new Set(); return elements.map(element => element.textContent.trim()).filter(text => text.length > 0 && !seen.has(text) && seen.add(text)); }')
+            title = await page.title()
+            # generate hash as ID for page
+            hashValue = self.generateHash(url+title, 16)
+            # same text already scraped under another URL (exact or near-duplicate), skip saving & rendering
+            with self.metrics.stage('dedup'):
+                canonical = self.dedup.checkText(await page.inner_text('body'), {'ID': hashValue, 'URL': url}) if self.DEDUP else None
+            if canonical is not None:
+                await page.close()
+            # save cheap formats right away
+            elif outputFormat != 'pdf':
+                artifactPath = directory / f"{hashValue}.{FILEEXTENSIONS[outputFormat]}"
+                with self.metrics.stage('save'):
+                    await self.saveArtifact(context, page, outputFormat, artifactPath)
+                self.metrics.addBytes(artifactPath.stat().st_size)
                 # close page after crawling is completed
                 await page.close()
-                # add URL to set of scraped pages after successful scraping
-                self.scrapedPages.add(url)
-                # remove whitespace from texts list 
-                #texts = [re.sub(r'\s+', ' ', text).strip() for text in texts]
-                # insert links into crawlingQueue
-                for link in links:
-                    await self.checkURL({'URL': link, 'TIER': tier+1, 'PARENT': url})
-                # construct metadata dictionary & save metadata
-                pageData = {'ID': hashValue, 'TIMESTAMP': int(time.time()), 'TYPE': 'page', 'URL': url, 'TIER': tier, 'TITLE': title, 'PARENT': parent}
-                await self.saveMetadata(self.hierarchy, pageData)
-
-            # if navigation fails, handle as file download
-            except Exception as e:
-                print(f"DOWNLOAD DETECTED: {url}", e)
-                # expect download
-                async with page.expect_download() as downloadInfo:
-                    # trigger download
-                    await page.evaluate("window.location.href = '{}';".format(url))
-                # wait for download to finish & get download object
-                download = await downloadInfo.value
-                # generate hash as ID for download
-                hashValue = self.generateHash(download.url+download.suggested_filename, 16)
-                # save download to disk
-                await download.save_as(f"{directory}/downloads/{hashValue}_{download.suggested_filename}")
-                print(f"DOWNLOAD SAVED: {download.suggested_filename}")
-                # add URL to set of scraped pages after successful download
-                self.scrapedPages.add(url)
-                # generate hash as ID for download
-                hashValue = self.generateHash(download.url+download.suggested_filename, 16)
-                # construct metadata dictionary & save metadata
-                downloadData = {'ID': hashValue, 'TIMESTAMP': int(time.time()), 'TYPE': 'download', 'URL': url, 'TIER': tier, 'TITLE': download.suggested_filename, 'PARENT': parent}
-                await self.saveMetadata(self.hierarchy, downloadData)
+            # add URL to set of scraped pages after successful scraping
+            self.scrapedPages.add(url)
+            # remove whitespace from texts list 
+            #texts = [re.sub(r'\s+', ' ', text).strip() for text in texts]
+            # insert links into crawlingQueue
+            self.checkLinks(links, tier+1, url, seed, anchors)
+            # construct metadata dictionary & save metadata
+            pageData = {'ID': hashValue, 'TIMESTAMP': int(time.time()), 'TYPE': 'page', 'URL': url, 'TIER': tier, 'TITLE': title, 'PARENT': parent, 'READYTIME': round(readyTime, 3)}
+            if canonical is not None:
+                self.saveAlias(canonical, pageData)
+                return status
+            if outputFormat == 'pdf':
+                # hand page over to render workers so this worker can continue with the next URL
+                # result & 'done' are saved once the PDF exists, so an interrupted render is scraped again on resume
+                self.renderingURLs.add(url)
+                with self.metrics.stage('renderwait'):
+                    await self.renderQueue.put({'PAGE': page, 'PATH': directory / f"{hashValue}.pdf", 'METADATA': pageData,
+                                                'LINKS': links, 'ETAG': etag, 'LASTMODIFIED': lastModified})
+                rendering = True
+            else:
+                self.saveMetadata(pageData)
+                self.saveResult(url, pageData, links, etag, lastModified)
 
-        except Exception as e:
-            print('ERROR WHILE SCRAPING', e)
         finally:
-            # release semaphore to allow new tasks to be created
-            self.semaphore.release()
+            # close page if still open (e.g. after a download) unless it waits for rendering
+            if not rendering and not page.is_closed():
+                await page.close()
+        return status
+
+    # function saving a URL the browser can't navigate to as download
+    async def scrapeBrowserDownload(self, page, url: str, tier: int, parent: str, directory: Path):
+        # expect download
+        async with page.expect_download() as downloadInfo:
+            # trigger download
+            await page.evaluate("window.location.href = '{}';".format(url))
+        # wait for download to finish & get download object
+        download = await downloadInfo.value
+        # generate hash as ID for download
+        hashValue = self.generateHash(download.url+download.suggested_filename, 16)
+        # save download to disk
+        downloadPath = directory / 'downloads' / f"{hashValue}_{download.suggested_filename}"
+        with self.metrics.stage('download'):
+            await download.save_as(downloadPath)
+        self.metrics.addBytes(downloadPath.stat().st_size)
+        # add URL to set of scraped pages after successful download
+        self.scrapedPages.add(url)
+        # construct metadata dictionary & save metadata
+        sha256 = await asyncio.to_thread(hashFile, downloadPath)
+        downloadData = {'ID': hashValue, 'TIMESTAMP': int(time.time()), 'TYPE': 'download', 'URL': url, 'TIER': tier, 'TITLE': download.suggested_filename, 'PARENT': parent, 'SHA256': sha256}
+        # same bytes already downloaded from another URL, drop the copy
+        canonical = self.dedup.checkBytes(sha256, {'ID': hashValue, 'URL': url}) if self.DEDUP else None
+        if canonical is not None:
+            downloadPath.unlink()
+            self.saveAlias(canonical, downloadData)
+        else:
+            logger.info("DOWNLOAD SAVED: %s", download.suggested_filename)
+            self.saveMetadata(downloadData)
+
+    # render worker function saving handed over pages as PDF until cancelled
+    async def renderWorker(self):
+        while True:
+            renderDict = await self.renderQueue.get()
+            page = renderDict['PAGE']
+            url = renderDict['METADATA']['URL']
+            # renders are traced separately, the page trace ends when the page is handed over
+            trace = self.metrics.startPage(url, renderDict['METADATA']['TIER'], kind='render')
+            status = 0
+            try:
+                # save page as pdf
+                with self.metrics.stage('pdf'):
+                    await page.emulate_media(media="screen")
+                    await page.pdf(path=renderDict['PATH'], landscape=False, scale=0.7)
+                self.metrics.addBytes(renderDict['PATH'].stat().st_size)
+                status = 200
+                # save metadata & result once the file exists
+                self.saveMetadata(renderDict['METADATA'])
+                self.saveResult(url, renderDict['METADATA'], renderDict['LINKS'], renderDict['ETAG'], renderDict['LASTMODIFIED'])
+            except Exception as e:
+                logger.error("ERROR WHILE RENDERING %s: %s", url, e)
+                # save the record without file anyway, pages linked from it were already queued & need their parent
+                self.saveMetadata({**renderDict['METADATA'], 'RENDERFAILED': True})
+            finally:
+                await page.close()
+                # failed renders are 'done' as well, like failed pages
+                self.renderingURLs.discard(url)
+                self.finishURL(url, 'done')
+                self.metrics.finishPage(trace, status)
+                self.renderQueue.task_done()
+
+    # function saving a page opened in the browser as mhtml, html or text
+    async def saveArtifact(self, context: BrowserContext, page, outputFormat: str, path: Path):
+        if outputFormat == 'mhtml':
+            # capture page incl. resources as single file via Chrome DevTools Protocol
+            cdpSession = await context.new_cdp_session(page)
+            snapshot = await cdpSession.send('Page.captureSnapshot', {'format': 'mhtml'})
+            await cdpSession.detach()
+            path.write_text(snapshot['data'], encoding='utf-8')
+        elif outputFormat == 'text':
+            path.write_text(re.sub(r'\s+', ' ', await page.inner_text('body')).strip(), encoding='utf-8')
+        else:
+            path.write_text(await page.content(), encoding='utf-8')
+
+    # function getting the output format of a page; PDF rendering can be limited to selected tiers
+    def pageFormat(self, tier: int):
+        if self.OUTPUTFORMAT == 'pdf' and self.PDFTIERS is not None and tier not in self.PDFTIERS:
+            return 'html'
+        return self.OUTPUTFORMAT
             
-    # function processing found URLs
-    async def checkURL(self, urlDict: dict):
-        # extract URL, tier & parent from dictionary
-        url = urlDict['URL']
-        tier = urlDict['TIER']
-        parent = urlDict['PARENT']
-        # exclude mailto & tel links
-        if url.startswith('mailto:') or url.startswith('tel:'):
-            return
-        # add URL to scrapping queue if conditions are fulfilled
-        if url not in self.scrapedPages and tier <= self.TIERLIMIT:
-            # extract domain & tld from url
-            extractURL = tldextract.extract(url)
-            # check if URL is an excluded URL
-            if extractURL.domain in self.excludedDomains:
-                #print('EXCLUDED URL:', url)
-                return
-            # only add URL within domain if domainLimit is set
-            if self.DOMAINLIMIT == True:
-                fullDomain = f"{extractURL.domain}.{extractURL.suffix}"
-                fullParentDomain = f"{tldextract.extract(parent).domain}.{tldextract.extract(parent).suffix}"
-                if fullDomain != fullParentDomain:
-                    return
-            # add valid URL to scrapingQueue
-            await self.scrapingQueue.put({'URL': url, 'TIER': tier, 'PARENT': parent})
+    # function processing all URLs found on a page at once
+    def checkLinks(self, links: list, tier: int, parent: str, seed: dict, anchors: dict = None):
+        anchors = anchors if anchors is not None else {}
+        # add valid URLs to scrapingQueue, marking them as seen so they are queued only once
+        with self.metrics.stage('checklinks'):
+            for link in self.linkFilter.filterLinks(links, tier, parent):
+                self.enqueueURL({'URL': link, 'TIER': tier, 'PARENT': parent, 'SEED': seed['INDEX'], 'SCORE': self.scoreLink(link, anchors.get(link, ''), tier)})
+
+    # function scoring a link for the best-first scrapingQueue; 0 for all links without scorer
+    def scoreLink(self, url: str, anchor: str, tier: int):
+        if self.scorer is None:
+            return 0.0
+        return self.scorer.score(url, anchor, tier)
                 
     # function for building metadata json
-    async def saveMetadata(self, hierarchy: list, metadata: dict):
-        # if top level URL, append as top node
-        if metadata['PARENT'] is None:
-            hierarchy.append(metadata)
-        # if not top level URL, search for parent in hierarchy, append as child
-        else:
-            for parent in hierarchy:
-                if parent['URL'] == metadata['PARENT']:
-                    if 'CHILDREN' not in parent:
-                        parent['CHILDREN'] = []
-                    parent['CHILDREN'].append(metadata)
-                    return
-                if 'CHILDREN' in parent:
-                    await self.saveMetadata(parent['CHILDREN'], metadata)
+    def saveMetadata(self, metadata: dict):
+        # append record to metadata log & attach to parent node via URL index
+        self.metadata.add(metadata)
                                 
-    # function for generating custom length hash
+    # function for generating custom length hash; used as file name, so '/' is removed like '+' & '='
     def generateHash(self, input: str, length: int):
         sha256Hash = hashlib.sha256(input.encode()).digest()
         encodedHash = base64.b64encode(sha256Hash).decode('utf-8')
-        return encodedHash.replace('//', '').replace('+', '').replace('=', '')[:length]
+        return encodedHash.replace('/', '').replace('+', '').replace('=', '')[:length]
     
     # function for dismissing cookie consent banners
-    async def dismissCookieConsent(self, page):
+    async def dismissCookieConsent(self, page, url: str):
         """Try to dismiss cookie consent banners by clicking common accept buttons."""
+        domain = registeredDomain(url)
+        texts, selectors = self.consentTexts, self.consentSelectors
+        if domain in self.consentCache:
+            pattern = self.consentCache[domain]
+            # domain is known to show no banner
+            if pattern is None:
+                return False
+            # only try the pattern that worked before on this domain
+            texts = [pattern[len('text='):]] if pattern.startswith('text=') else []
+            selectors = [] if pattern.startswith('text=') else [pattern]
         try:
-            for selector in self.consentSelectors:
-                try:
-                    # Check if the element exists and is visible
-                    element = page.locator(selector).first
-                    if await element.is_visible(timeout=500):
-                        await element.click(timeout=1000)
-                        print(f"CONSENT DISMISSED: clicked '{selector}'")
-                        # Wait for modal to disappear
-                        await page.wait_for_timeout(500)
-                        return True
-                except Exception:
-                    # Selector not found or not clickable, try next
-                    continue
+            # detect & click first visible match across all patterns in one evaluate call
+            pattern = await page.evaluate(CONSENTSCRIPT, {'texts': texts, 'selectors': selectors})
         except Exception as e:
-            print(f"CONSENT HANDLING ERROR: {e}")
-        return False
\ No newline at end of file
+            logger.warning("CONSENT HANDLING ERROR: %s", e)
+            return False
+        # remember result for later pages of this domain (keep a working pattern even if the banner is gone)
+        if domain not in self.consentCache:
+            self.consentCache[domain] = pattern
+        if pattern is None:
+            return False
+        logger.debug("CONSENT DISMISSED: clicked '%s'", pattern)
+        # Wait for modal to disappear (DOM quiet, at most 1s)
+        await self.readiness.waitForQuiet(page, 0.2, 1.0)
+        return True
@@ -1,11 +1,38 @@
 import time
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from duckduckgo_search import DDGS
+from frontier import FrontierClass
+
+logger = logging.getLogger(__name__)
+
+class DDGSBackend:
+    # search backend using DuckDuckGo Search (no API key needed)
+    def text(self, term: str, searchLimit: int):
+        # one DDGS instance per call, calls run in parallel threads
+        results = list(DDGS().text(term, max_results=searchLimit))
+        logger.debug("Raw results: %s", results)
+        return [result.get('href') or result.get('link') for result in results if result.get('href') or result.get('link')]
 
 class SearchClass:
-    def __init__(self):
-        # No API key needed for DuckDuckGo
-        # Create a single DDGS instance to reuse
-        self.ddgs = DDGS()
+    # initialize search client; backend must provide text(term, searchLimit) returning a list of URLs
+    def __init__(self, backend=None, maxWorkers: int = 4, maxRetries: int = 3, cacheDir: str = './output/searchcache', cacheTTL: int = 24 * 3600):
+        # search provider, DuckDuckGo by default (tests can pass a local fake)
+        self.backend = backend if backend is not None else DDGSBackend()
+        # limit number of concurrent searches
+        self.MAXWORKERS = maxWorkers
+        # number of retries per search term
+        self.MAXRETRIES = maxRetries
+        # on-disk cache of search results (None = disabled) & time to live in seconds
+        self.cacheDir = Path(cacheDir) if cacheDir is not None else None
+        self.CACHETTL = cacheTTL
+        # used for normalizing URLs when removing duplicates across terms
+        self.frontier = FrontierClass()
 
     # placeholder function to extract suitable search terms from user input, potentially using LLMs
     def searchTermExtractor(self, userInput: str):
@@ -13,43 +40,76 @@ class SearchClass:
         # placeholder for search term translation
         for term in userInput.split(','):
             searchTerms.append(term.strip())
-        print(searchTerms)
+        logger.info("Search terms: %s", searchTerms)
         return searchTerms
-        
-    # search function using DuckDuckGo Search
+
+    # search function using the backend, retried with exponential backoff
     def search(self, term: str, searchLimit: int):
         # list for storing found URLs
         searchResult = []
-        # search for the term
-        try:
-            # Use the text search method
-            results = list(self.ddgs.text(term, max_results=searchLimit))
-            print(f"Raw results: {results}")
-            for result in results:
-                if 'href' in result:
-                    searchResult.append(result['href'])
-                elif 'link' in result:
-                    searchResult.append(result['link'])
-            print(f"No. Search Results #{len(searchResult)}")
-        except Exception as err:
-            print(f"Search Error: {err}")
-            import traceback
-            traceback.print_exc()
-            
+        # return cached result if still valid
+        cached = self.loadCache(term, searchLimit)
+        if cached is not None:
+            logger.info("Cached results for '%s': #%d", term, len(cached))
+            return cached
+        for attempt in range(self.MAXRETRIES + 1):
+            try:
+                searchResult = self.backend.text(term, searchLimit)
+                logger.info("Search results for '%s': #%d", term, len(searchResult))
+                self.saveCache(term, searchLimit, searchResult)
+                return searchResult
+            except Exception as err:
+                logger.warning("Search Error (%d/%d): %s", attempt + 1, self.MAXRETRIES + 1, err)
+                if attempt < self.MAXRETRIES:
+                    # exponential backoff with jitter, e.g. after rate limiting
+                    time.sleep(2 ** attempt + random.random())
         return searchResult
 
-    # main function to run searches
+    # main function to run searches concurrently
     async def runSearch(self, userInput: str, searchLimit: int):
         # extract search terms from user input
         searchTerms = self.searchTermExtractor(userInput)
         start = time.time()
-        # list for storing search results
+        # run search for each search term in a bounded thread pool, so the event loop is not blocked
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.MAXWORKERS) as executor:
+            termResults = await asyncio.gather(*[loop.run_in_executor(executor, self.search, term, searchLimit) for term in searchTerms])
+        # remove duplicates across terms (normalized URLs), keep order of first occurrence
         searchResults = []
-        # run search for each search term
-        for term in searchTerms:
-            searchResults.extend(self.search(term, searchLimit))
-            
-        print(f"Total URLs found: {searchResults}")
-        print(f"Search time: {time.time()-start:.2f}s")
-        
-        return searchResults
\ No newline at end of file
+        seen = set()
+        for url in [url for termResult in termResults for url in termResult]:
+            normalizedURL = self.frontier.normalizeURL(url)
+            if normalizedURL not in seen:
+                seen.add(normalizedURL)
+                searchResults.append(url)
+
+        logger.info("Total URLs found: %s", searchResults)
+        logger.info("Search time: %.2fs", time.time()-start)
+
+        return searchResults
+
+    # function getting cache file of a search term & limit
+    def cachePath(self, term: str, searchLimit: int):
+        key = hashlib.sha256(json.dumps([term, searchLimit]).encode()).hexdigest()
+        return self.cacheDir / f"{key}.json"
+
+    # function loading cached search result, None if missing or expired
+    def loadCache(self, term: str, searchLimit: int):
+        if self.cacheDir is None:
+            return None
+        path = self.cachePath(term, searchLimit)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['TIMESTAMP'] > self.CACHETTL:
+            return None
+        return entry['RESULTS']
+
+    # function saving search result to cache; empty results are not cached
+    def saveCache(self, term: str, searchLimit: int, results: list):
+        if self.cacheDir is None or not results:
+            return
+        self.cacheDir.mkdir(parents=True, exist_ok=True)
+        entry = {'TERM': term, 'LIMIT': searchLimit, 'TIMESTAMP': int(time.time()), 'RESULTS': results}
+        self.cachePath(term, searchLimit).write_text(json.dumps(entry))
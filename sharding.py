@@ -0,0 +1,233 @@
+import asyncio
+import multiprocessing
+import queue
+import hashlib
+import logging
+import time
+from pathlib import Path
+from scraper import ScraperClass
+from metadata import MetadataClass
+from politeness import HostSchedulerClass
+from crawlstore import CrawlStoreClass
+from frontier import FrontierClass
+from linkfilter import registeredDomain
+from instrumentation import MetricsClass, configureLogging
+
+logger = logging.getLogger(__name__)
+
+# get shard of a URL by hash of its registered domain; stable across processes (unlike hash())
+def shardOf(url: str, shards: int):
+    digest = hashlib.blake2b(registeredDomain(url).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+# get path of a separate crawl store next to statePath, e.g. './output/crawl-shard0of4.db'
+def shardStatePath(statePath: str, name: str):
+    path = Path(statePath)
+    return path.with_name(f"{path.stem}-{name}{path.suffix}")
+
+class SharedSchedulerClass(HostSchedulerClass):
+    # host scheduler additionally counting unfinished URLs in a counter shared by all shards
+    def __init__(self, pending, **kwargs):
+        super().__init__(**kwargs)
+        self.sharedPending = pending
+
+    def put_nowait(self, urlDict: dict):
+        with self.sharedPending.get_lock():
+            self.sharedPending.value += 1
+        super().put_nowait(urlDict)
+
+    def task_done(self):
+        super().task_done()
+        with self.sharedPending.get_lock():
+            self.sharedPending.value -= 1
+
+class ShardScraperClass(ScraperClass):
+    # initialize scraper of a single shard; crawls only URLs whose registered domain hashes to this shard
+    def __init__(self, shard: int, shards: int, shared: dict, **scraperArgs):
+        super().__init__(**scraperArgs)
+        self.SHARD = shard
+        self.SHARDS = shards
+        # inbox per shard for forwarded URLs, counter of unfinished URLs across all shards & shared scraping counters
+        self.inboxes = shared['INBOXES']
+        self.pending = shared['PENDING']
+        self.seedCounts = shared['SEEDCOUNTS']
+        self.total = shared['TOTAL']
+        # queued URLs of this shard are counted in the shared counter so shards know when the crawl is completed
+        self.scrapingQueue = SharedSchedulerClass(self.pending)
+        # URLs already forwarded to other shards; every URL has exactly one owning shard, which dedups it for good
+        self.forwarded = FrontierClass()
+
+    # function crawling the URLs of this shard; metadata is merged by ShardedScraperClass
+    async def runScraper(self, topLevelURLs: list):
+        resumed = False
+        if self.crawlStore is not None:
+            run = self.crawlStore.startRun(topLevelURLs, self.outputDir)
+            # state belongs to another output directory (e.g. its run was not resumed), start a new run
+            if run['RESUMED'] and Path(run['OUTPUTDIR']).resolve() != self.outputDir.resolve():
+                self.crawlStore.finishRun()
+                run = self.crawlStore.startRun(topLevelURLs, self.outputDir)
+            resumed = run['RESUMED']
+        self.metadata = MetadataClass(self.outputDir / f'metadata-shard{self.SHARD}.jsonl')
+        if self.METRICS:
+            self.metrics = MetricsClass(self.outputDir / f'trace-shard{self.SHARD}.jsonl', self.outputDir / f'metrics-shard{self.SHARD}.prom')
+            self.metrics.attachQueue(self.scrapingQueue)
+        self.seeds = [self.createSeed(url, i) for i, url in enumerate(topLevelURLs)]
+        if resumed:
+            # restore seen set & queued URLs, add pages scraped by this shard to the shared counters
+            fingerprints, self.resumedURLs, counts = self.crawlStore.loadFrontier()
+            self.frontier.seen.update(fingerprints)
+            with self.total.get_lock():
+                for seedIndex, count in counts.items():
+                    self.seedCounts[seedIndex] += count
+                    self.total.value += count
+        await self.scrapePages(self.seeds)
+        self.metadata.close()
+        self.metrics.close()
+        if self.crawlStore is not None:
+            self.crawlStore.finishRun()
+            self.crawlStore.close()
+        report = self.resourcePolicy.report()
+        logger.info("BROWSER RESOURCES: %.1f MB received, %d requests blocked %s", report['TRANSFERREDBYTES']/1e6, report['BLOCKED'], report['BYTYPE'])
+        return self.outputDir
+
+    # function counting a page against the scraping limits shared by all shards
+    def claimPage(self, seed: dict):
+        with self.total.get_lock():
+            if self.total.value >= self.TOTALSCRAPINGLIMIT or self.seedCounts[seed['INDEX']] >= self.SCRAPINGLIMIT:
+                return False
+            self.seedCounts[seed['INDEX']] += 1
+            self.total.value += 1
+            self.totalCount = self.total.value
+        return True
+
+    def releasePage(self, seed: dict):
+        with self.total.get_lock():
+            self.seedCounts[seed['INDEX']] -= 1
+            self.total.value -= 1
+            self.totalCount = self.total.value
+
+    # function adding a URL to scrapingQueue if it belongs to this shard, otherwise forwarding it to its shard
+    def enqueueURL(self, urlDict: dict):
+        shard = shardOf(urlDict['URL'], self.SHARDS)
+        if shard == self.SHARD:
+            return super().enqueueURL(urlDict)
+        if not self.forwarded.add(urlDict['URL']):
+            return False
+        # count forwarded URL as unfinished until the receiving shard has queued (or dropped) it
+        with self.pending.get_lock():
+            self.pending.value += 1
+        self.inboxes[shard].put(urlDict)
+        return True
+
+    # function waiting until no shard has unfinished or forwarded URLs left
+    async def waitUntilCrawled(self):
+        receiver = asyncio.create_task(self.receiveURLs())
+        # release the start token once seeds & resumed URLs of this shard are queued
+        with self.pending.get_lock():
+            self.pending.value -= 1
+        try:
+            while self.pending.value > 0:
+                await asyncio.sleep(0.1)
+        finally:
+            receiver.cancel()
+            await asyncio.gather(receiver, return_exceptions=True)
+
+    # function queuing URLs forwarded by other shards until cancelled
+    async def receiveURLs(self):
+        inbox = self.inboxes[self.SHARD]
+        while True:
+            try:
+                urlDict = inbox.get_nowait()
+            except queue.Empty:
+                await asyncio.sleep(0.05)
+                continue
+            # queue first, then drop the forwarding count, so the shared counter never drops to zero in between
+            self.enqueueURL(urlDict)
+            with self.pending.get_lock():
+                self.pending.value -= 1
+
+# entry point of a shard process; each shard has its own event loop & browser
+def runShard(shard: int, shards: int, shared: dict, scraperArgs: dict, topLevelURLs: list, logLevel: int = logging.INFO):
+    # spawned processes don't inherit the logging configuration
+    configureLogging(logLevel)
+    scraper = ShardScraperClass(shard, shards, shared, **scraperArgs)
+    asyncio.run(scraper.runScraper(topLevelURLs))
+
+class ShardedScraperClass:
+    # initialize sharded scraper; takes the arguments of ScraperClass, URLs are partitioned by registered domain over `shards` processes
+    def __init__(self, shards: int, **scraperArgs):
+        self.SHARDS = shards
+        self.scraperArgs = scraperArgs
+        self.statePath = scraperArgs.pop('statePath', None)
+        # registry of sharded runs, so an interrupted run is resumed in its output directory
+        self.crawlStore = CrawlStoreClass(shardStatePath(self.statePath, f'shards{shards}')) if self.statePath is not None else None
+        outputTime = time.strftime("%d%m%Y-%H%M%S")
+        self.outputDir = Path(f'./output/{outputTime}/')
+        # shards write their own metrics, this one records the upload (created once the output directory is known)
+        self.metrics = MetricsClass()
+
+    # main function starting one process per shard & merging their output into a single metadata.json
+    async def runScraper(self, topLevelURLs: list):
+        start = time.time()
+        if self.crawlStore is not None:
+            run = self.crawlStore.startRun(topLevelURLs, self.outputDir)
+            if run['RESUMED']:
+                logger.info("RESUMING CRAWL: %s", run['OUTPUTDIR'])
+            self.outputDir = run['OUTPUTDIR']
+        self.outputDir.mkdir(parents=True, exist_ok=True)
+        if self.scraperArgs.get('metrics', False):
+            self.metrics = MetricsClass(self.outputDir / 'trace.jsonl', self.outputDir / 'metrics.prom')
+
+        # spawn instead of fork, Playwright & asyncio must not be inherited by child processes
+        context = multiprocessing.get_context('spawn')
+        shared = {
+            'INBOXES': [context.Queue() for _ in range(self.SHARDS)],
+            # one start token per shard keeps the counter above zero until every shard has queued its URLs
+            'PENDING': context.Value('q', self.SHARDS),
+            'SEEDCOUNTS': context.Array('q', len(topLevelURLs), lock=False),
+            'TOTAL': context.Value('q', 0),
+        }
+        processes = []
+        for shard in range(self.SHARDS):
+            statePath = shardStatePath(self.statePath, f'shard{shard}of{self.SHARDS}') if self.statePath is not None else None
+            scraperArgs = {**self.scraperArgs, 'statePath': statePath, 'outputDir': self.outputDir, 'concurrentSeeds': True}
+            processes.append(context.Process(target=runShard, args=(shard, self.SHARDS, shared, scraperArgs, topLevelURLs, logging.getLogger().getEffectiveLevel()), name=f'shard{shard}'))
+        for process in processes:
+            process.start()
+        # wait for all shards; a failed shard would leave the others waiting for its URLs, so stop them
+        failed = await asyncio.to_thread(self.waitForShards, processes)
+        if failed:
+            raise RuntimeError(f"shards {failed} failed, run again to resume the crawl")
+
+        self.mergeMetadata(topLevelURLs)
+        if self.crawlStore is not None:
+            self.crawlStore.finishRun()
+            self.crawlStore.close()
+        logger.info("TOTAL SCRAPING TIME: %.2fs", time.time()-start)
+        return self.outputDir
+
+    # function joining shard processes; terminates all shards once one fails & returns the failed shards
+    def waitForShards(self, processes: list):
+        while any(process.is_alive() for process in processes):
+            if any(process.exitcode not in (None, 0) for process in processes):
+                for process in processes:
+                    process.terminate()
+            time.sleep(0.5)
+        return [shard for shard, process in enumerate(processes) if process.exitcode != 0]
+
+    # function merging per-shard metadata logs into metadata.jsonl & metadata.json
+    def mergeMetadata(self, topLevelURLs: list):
+        logPath = self.outputDir / 'metadata.jsonl'
+        shardLogs = sorted(self.outputDir.glob('metadata-shard*.jsonl'))
+        with open(logPath, 'w', encoding='utf-8') as logFile:
+            for shardLog in shardLogs:
+                for line in open(shardLog, encoding='utf-8'):
+                    logFile.write(line if line.endswith('\n') else line + '\n')
+        for shardLog in shardLogs:
+            shardLog.unlink()
+        # children are attached to parents scraped by other shards when loading the merged log
+        metadata = MetadataClass()
+        metadata.load(logPath)
+        seedOrder = {url: i for i, url in enumerate(topLevelURLs)}
+        metadata.roots.sort(key=lambda node: seedOrder.get(node['URL'], len(topLevelURLs)))
+        metadata.writeTree(self.outputDir / 'metadata.json')
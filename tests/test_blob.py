@@ -0,0 +1,26 @@
+from pathlib import Path
+from blob import indexMetadata, fileID, formatMetadata
+from scraper import ScraperClass
+
+TREE = [{'ID': 'root', 'TIMESTAMP': 1, 'TYPE': 'page', 'URL': 'https://a.com/', 'TIER': 0, 'TITLE': 'Café – Home', 'PARENT': None, 'CHILDREN': [
+    {'ID': 'child', 'TIMESTAMP': 2, 'TYPE': 'download', 'URL': 'https://a.com/r.pdf', 'TIER': 1, 'TITLE': 'r.pdf', 'PARENT': 'https://a.com/', 'CHILDREN': []},
+]}]
+
+def test_index_metadata_covers_nested_nodes():
+    index = indexMetadata(TREE)
+    assert set(index) == {'root', 'child'}
+    assert index['root']['TITLE'] == 'Caf_ - Home'
+    assert index['root']['PARENT'] == 'None' and index['child']['TIER'] == '1'
+    assert all(isinstance(value, str) for value in formatMetadata(TREE[0]).values())
+
+def test_file_id_of_pages_and_downloads():
+    index = indexMetadata(TREE)
+    assert index[fileID(Path('run/a/root.pdf'))]['URL'] == 'https://a.com/'
+    assert index[fileID(Path('run/a/downloads/child_annual_report.v2.pdf'))]['URL'] == 'https://a.com/r.pdf'
+
+def test_generated_ids_are_file_names():
+    scraper = ScraperClass.__new__(ScraperClass)
+    for i in range(2000):
+        hashValue = scraper.generateHash(f"https://a.com/{i}", 16)
+        assert len(hashValue) == 16 and not set(hashValue) & set('/+=._')
+        assert fileID(Path(f"run/a/downloads/{hashValue}_file.pdf")) == hashValue
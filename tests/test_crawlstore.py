@@ -0,0 +1,51 @@
+from crawlstore import CrawlStoreClass
+
+SEEDS = ['https://a.com/']
+
+def enqueue(store: CrawlStoreClass, url: str, fingerprint: int, parent: str = None):
+    store.enqueue({'URL': url, 'TIER': 0 if parent is None else 1, 'PARENT': parent, 'SEED': 0}, fingerprint)
+
+def test_resume_after_crash(tmp_path):
+    store = CrawlStoreClass(tmp_path / 'crawl.db')
+    run = store.startRun(SEEDS, tmp_path)
+    assert not run['RESUMED']
+    enqueue(store, 'https://a.com/', 1)
+    enqueue(store, 'https://a.com/x', 2, 'https://a.com/')
+    enqueue(store, 'https://a.com/y', 2 ** 64 - 1, 'https://a.com/')
+    store.finish(1, 'done')
+    # crash: connection is dropped without closing or finishing the run
+    del store
+
+    store = CrawlStoreClass(tmp_path / 'crawl.db')
+    run = store.startRun(SEEDS, tmp_path / 'new')
+    assert run['RESUMED'] and run['OUTPUTDIR'] == tmp_path
+    fingerprints, queued, counts = store.loadFrontier()
+    assert sorted(fingerprints) == [1, 2, 2 ** 64 - 1]
+    assert sorted(urlDict['URL'] for urlDict in queued) == ['https://a.com/x', 'https://a.com/y']
+    assert counts == {0: 1}
+    store.close()
+
+def test_finished_run_starts_new_run(tmp_path):
+    store = CrawlStoreClass(tmp_path / 'crawl.db')
+    first = store.startRun(SEEDS, tmp_path)
+    enqueue(store, 'https://a.com/', 1)
+    store.finishRun()
+    second = store.startRun(SEEDS, tmp_path)
+    assert not second['RESUMED'] and second['ID'] != first['ID']
+    assert store.loadFrontier() == ([], [], {})
+    store.close()
+
+def test_results_are_kept_across_runs(tmp_path):
+    store = CrawlStoreClass(tmp_path / 'crawl.db')
+    store.startRun(SEEDS, tmp_path)
+    store.saveResult('https://a.com/', {'ID': 'a'}, ['https://a.com/x'], etag='"v1"', lastModified='Mon, 01 Jan 2024 00:00:00 GMT')
+    store.finishRun()
+    store.close()
+
+    store = CrawlStoreClass(tmp_path / 'crawl.db')
+    store.startRun(SEEDS, tmp_path)
+    result = store.result('https://a.com/')
+    assert result['METADATA'] == {'ID': 'a'} and result['LINKS'] == ['https://a.com/x']
+    assert store.conditionalHeaders(result) == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert store.result('https://a.com/x') is None
+    store.close()
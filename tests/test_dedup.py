@@ -0,0 +1,38 @@
+from dedup import DedupClass, hashFile
+
+TEXT = ' '.join(f"word{i} filler{i % 7} term{i % 11}" for i in range(100))
+
+def test_exact_duplicate_text():
+    dedup = DedupClass()
+    assert dedup.checkText(TEXT, {'ID': 'a'}) is None
+    # whitespace, case & punctuation don't matter
+    assert dedup.checkText('  ' + TEXT.upper().replace(' ', ',  '), {'ID': 'b'}) == {'ID': 'a'}
+
+def test_near_duplicate_text():
+    dedup = DedupClass()
+    assert dedup.checkText(TEXT, {'ID': 'a'}) is None
+    assert dedup.checkText(TEXT + ' footer', {'ID': 'b'}) == {'ID': 'a'}
+    other = ' '.join(f"other{i} page{i % 5}" for i in range(150))
+    assert dedup.checkText(other, {'ID': 'c'}) is None
+
+def test_empty_and_short_texts_are_never_duplicates():
+    dedup = DedupClass()
+    assert dedup.checkText('', {'ID': 'a'}) is None
+    assert dedup.checkText('', {'ID': 'b'}) is None
+    assert dedup.checkText('Loading ...', {'ID': 'c'}) is None
+    assert dedup.checkText('Loading ...', {'ID': 'd'}) is None
+
+def test_short_texts_are_compared_exactly():
+    dedup = DedupClass()
+    text = 'one two three four five six'
+    assert dedup.checkText(text, {'ID': 'a'}) is None
+    assert dedup.checkText(text, {'ID': 'b'}) == {'ID': 'a'}
+    assert dedup.checkText(text + ' seven', {'ID': 'c'}) is None
+
+def test_duplicate_bytes(tmp_path):
+    path = tmp_path / 'file.bin'
+    path.write_bytes(b'x' * 3000000)
+    dedup = DedupClass()
+    sha256 = hashFile(path)
+    assert dedup.checkBytes(sha256, {'ID': 'a'}) is None
+    assert dedup.checkBytes(sha256, {'ID': 'b'}) == {'ID': 'a'}
@@ -0,0 +1,94 @@
+import asyncio
+from aiohttp import web
+from fetcher import FetcherClass, LinkParser
+
+PAGE = """<html><head><title> Annual Reports </title><base href="/docs/"><script>var x = '<a href="/js">';</script></head>
+<body><h1>Reports</h1><a href="2023.pdf">Report <b>2023</b></a> <a href="2023.pdf">again</a>
+<a href="https://other.com/x#top" title="Other site"></a><style>.a {}</style><p>Contact us</p></body></html>"""
+
+# function serving a small site on localhost while running test coroutine with the fetcher & base URL
+def serve(test, maxDownloadSize: int = 1024):
+    async def handlePage(request):
+        return web.Response(text=PAGE, content_type='text/html')
+
+    async def handleFile(request):
+        size = int(request.match_info['size'])
+        return web.Response(body=b'x' * size, content_type='application/pdf',
+                            headers={'Content-Disposition': 'attachment; filename="annual report.pdf"'})
+
+    # streamed without Content-Length, so the size is only known while downloading
+    async def handleStream(request):
+        response = web.StreamResponse(headers={'Content-Type': 'application/octet-stream'})
+        await response.prepare(request)
+        for _ in range(int(request.match_info['size']) // 256):
+            await response.write(b'y' * 256)
+        await response.write_eof()
+        return response
+
+    async def handleNoHead(request):
+        if request.method == 'HEAD':
+            raise web.HTTPMethodNotAllowed('HEAD', ['GET'])
+        return web.Response(body=b'%PDF', content_type='application/pdf')
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/page', handlePage)
+        app.router.add_get('/file/{size}', handleFile)
+        app.router.add_get('/stream/{size}', handleStream)
+        app.router.add_route('*', '/nohead', handleNoHead)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with FetcherClass(maxDownloadSize=maxDownloadSize) as fetcher:
+                await test(fetcher, f"http://127.0.0.1:{port}")
+        finally:
+            await runner.cleanup()
+    asyncio.run(run())
+
+def test_link_parser():
+    parser = LinkParser('https://example.com/a/page.html')
+    parser.feed(PAGE)
+    parser.close()
+    assert parser.title.strip() == 'Annual Reports'
+    # relative links are resolved against <base href>, duplicates & links in scripts are dropped
+    assert parser.links == ['https://example.com/docs/2023.pdf', 'https://other.com/x#top']
+    assert parser.anchors['https://example.com/docs/2023.pdf'].split() == ['Report', '2023']
+    assert parser.anchors['https://other.com/x#top'] == 'Other site'
+    text = ' '.join(' '.join(parser.texts).split())
+    assert 'Contact us' in text and 'var x' not in text and '.a {}' not in text
+
+def test_preflight_routes_by_content_type():
+    async def test(fetcher, base):
+        page = await fetcher.preflight(f"{base}/page")
+        assert page['HTML'] and page['STATUS'] == 200
+        document = await fetcher.preflight(f"{base}/file/10")
+        assert not document['HTML'] and document['FILENAME'] == 'annual_report.pdf' and document['LENGTH'] == 10
+        # servers refusing HEAD are asked with a ranged GET
+        assert (await fetcher.preflight(f"{base}/nohead"))['CONTENTTYPE'] == 'application/pdf'
+        assert await fetcher.preflight('http://127.0.0.1:1/') is None
+    serve(test)
+
+def test_fetch_html():
+    async def test(fetcher, base):
+        page = await fetcher.fetchHTML(f"{base}/page")
+        assert page['TITLE'] == 'Annual Reports'
+        assert page['LINKS'][0] == f"{base}/docs/2023.pdf"
+        assert page['ANCHORS'][f"{base}/docs/2023.pdf"] == 'Report 2023'
+        assert not fetcher.needsRendering(page)
+        assert fetcher.needsRendering({'HTML': '<div id="root"></div>', 'LINKS': []})
+    serve(test)
+
+def test_download_size_cap(tmp_path):
+    async def test(fetcher, base):
+        result = await fetcher.download(f"{base}/file/1000", tmp_path / 'downloads' / 'small.pdf')
+        assert result['SIZE'] == 1000 and (tmp_path / 'downloads' / 'small.pdf').stat().st_size == 1000
+        # announced size above the cap
+        assert await fetcher.download(f"{base}/file/2000", tmp_path / 'large.pdf') is None
+        assert not (tmp_path / 'large.pdf').exists()
+        # streamed size above the cap, the partial file is removed
+        assert await fetcher.download(f"{base}/stream/4096", tmp_path / 'stream.bin') is None
+        assert not (tmp_path / 'stream.bin').exists()
+    serve(test)
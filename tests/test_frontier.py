@@ -0,0 +1,17 @@
+from frontier import FrontierClass
+
+def test_normalize_url():
+    frontier = FrontierClass()
+    assert frontier.normalizeURL('HTTPS://Example.COM:443/a/b/?z=1&a=2#section') == 'https://example.com/a/b?a=2&z=1'
+    assert frontier.normalizeURL('http://example.com:80') == 'http://example.com/'
+    assert frontier.normalizeURL('http://example.com:8080/') == 'http://example.com:8080/'
+    assert frontier.normalizeURL('https://example.com/?q=') == 'https://example.com/?q='
+    # malformed ports are kept as is
+    assert frontier.normalizeURL('http://example.com:port/') == 'http://example.com:port/'
+
+def test_add_marks_equivalent_urls_seen():
+    frontier = FrontierClass()
+    assert frontier.add('https://example.com/a?x=1&y=2')
+    assert not frontier.add('https://EXAMPLE.com/a/?y=2&x=1#top')
+    assert 'https://example.com/a?y=2&x=1' in frontier
+    assert len(frontier) == 1
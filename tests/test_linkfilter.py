@@ -0,0 +1,25 @@
+from linkfilter import LinkFilterClass, registeredDomain, domainName, hostOf
+
+EXCLUDED = set(['youtube', 'facebook'])
+
+def test_domains():
+    assert registeredDomain('https://news.bbc.co.uk/a') == 'bbc.co.uk'
+    assert domainName('https://news.bbc.co.uk/a') == 'bbc'
+    assert hostOf('https://WWW.Example.com:8080/') == 'www.example.com'
+    # malformed URLs have no host
+    assert hostOf('http://[::1/') == ''
+
+def test_filter_links_by_scheme_exclusion_and_domain():
+    linkFilter = LinkFilterClass(EXCLUDED, tierLimit=2, domainLimit=True)
+    links = ['https://www.bbc.co.uk/news', 'https://bbc.co.uk/sport', 'HTTP://shop.bbc.co.uk/', 'https://bbc.com/',
+             'mailto:info@bbc.co.uk', 'javascript:void(0)', 'https://www.youtube.com/watch?v=1', 'ftp://bbc.co.uk/file']
+    assert linkFilter.filterLinks(links, 1, 'https://news.bbc.co.uk/') == ['https://www.bbc.co.uk/news', 'https://bbc.co.uk/sport', 'HTTP://shop.bbc.co.uk/']
+
+def test_filter_links_without_domain_limit():
+    linkFilter = LinkFilterClass(EXCLUDED, tierLimit=2, domainLimit=False)
+    links = ['https://bbc.com/', 'https://m.facebook.com/page', 'https://example.org/']
+    assert linkFilter.filterLinks(links, 2, 'https://news.bbc.co.uk/') == ['https://bbc.com/', 'https://example.org/']
+
+def test_filter_links_beyond_tier_limit():
+    linkFilter = LinkFilterClass(EXCLUDED, tierLimit=2, domainLimit=False)
+    assert linkFilter.filterLinks(['https://example.org/'], 3, 'https://example.com/') == []
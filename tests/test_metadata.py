@@ -0,0 +1,60 @@
+import json
+from metadata import MetadataClass, buildTree
+
+def record(url: str, parent: str = None):
+    return {'ID': url, 'URL': url, 'PARENT': parent, 'TYPE': 'page'}
+
+def test_children_saved_before_parent_are_attached():
+    store = MetadataClass()
+    store.add(record('b', 'a'))
+    store.add(record('a', 'root'))
+    store.add(record('root'))
+    assert store.orphans == {}
+    assert store.roots[0]['CHILDREN'][0]['URL'] == 'a'
+    assert store.roots[0]['CHILDREN'][0]['CHILDREN'][0]['URL'] == 'b'
+
+def test_orphans_without_parent_are_written_as_top_nodes(tmp_path):
+    store = MetadataClass()
+    store.add(record('root'))
+    store.add(record('c', 'missing'))
+    store.add(record('d', 'c'))
+    store.writeTree(tmp_path / 'metadata.json')
+    tree = json.loads((tmp_path / 'metadata.json').read_text())
+    assert [node['URL'] for node in tree] == ['root', 'c']
+    assert tree[1]['CHILDREN'][0]['URL'] == 'd'
+
+def test_log_is_reloaded_after_crash(tmp_path):
+    logPath = tmp_path / 'metadata.jsonl'
+    store = MetadataClass(logPath)
+    store.add(record('root'))
+    store.add(record('a', 'root'))
+    store.close()
+    # crash while writing the next record
+    with open(logPath, 'a', encoding='utf-8') as logFile:
+        logFile.write('{"ID": "b", "URL"')
+
+    store = MetadataClass(logPath)
+    assert [node['URL'] for node in store.roots] == ['root']
+    store.add(record('c', 'missing'))
+    store.close()
+    lines = logPath.read_text(encoding='utf-8').splitlines()
+    assert json.loads(lines[-1])['URL'] == 'c'
+    roots = buildTree(logPath)
+    assert [node['URL'] for node in roots] == ['root', 'c']
+    assert roots[0]['CHILDREN'][0]['URL'] == 'a'
+
+def test_url_saved_again_replaces_its_record(tmp_path):
+    logPath = tmp_path / 'metadata.jsonl'
+    store = MetadataClass(logPath)
+    store.add(record('root'))
+    store.add(record('a', 'root'))
+    store.add(record('b', 'a'))
+    store.close()
+    # resumed run scrapes 'a' again
+    store = MetadataClass(logPath)
+    store.add({**record('a', 'root'), 'ID': 'a2'})
+    store.close()
+    for roots in (store.roots, buildTree(logPath)):
+        assert len(roots[0]['CHILDREN']) == 1
+        assert roots[0]['CHILDREN'][0]['ID'] == 'a2'
+        assert roots[0]['CHILDREN'][0]['CHILDREN'][0]['URL'] == 'b'
@@ -0,0 +1,68 @@
+import asyncio
+from politeness import HostSchedulerClass
+
+# function getting all queued URLs in the order the scheduler hands them out
+async def drain(scheduler: HostSchedulerClass):
+    urls = []
+    while not scheduler.empty():
+        urlDict = await scheduler.get()
+        urls.append(urlDict['URL'])
+        scheduler.release(urlDict, 0.01, None)
+        scheduler.task_done()
+    return urls
+
+def test_best_scored_urls_first_across_hosts():
+    scheduler = HostSchedulerClass(minDelay=0)
+    for url, score in [('https://a.com/1', 1.0), ('https://a.com/2', 3.0), ('https://b.com/1', 2.0), ('https://b.com/2', 0.0)]:
+        scheduler.put_nowait({'URL': url, 'SCORE': score})
+    assert asyncio.run(drain(scheduler)) == ['https://a.com/2', 'https://b.com/1', 'https://a.com/1', 'https://b.com/2']
+
+def test_equal_scores_keep_order_and_hosts_take_turns():
+    scheduler = HostSchedulerClass(minDelay=0)
+    for url in ['https://a.com/1', 'https://a.com/2', 'https://b.com/1', 'https://b.com/2']:
+        scheduler.put_nowait({'URL': url})
+    assert asyncio.run(drain(scheduler)) == ['https://a.com/1', 'https://b.com/1', 'https://a.com/2', 'https://b.com/2']
+
+def test_host_delay_lets_other_hosts_go_first():
+    scheduler = HostSchedulerClass(minDelay=0.2)
+    for url, score in [('https://a.com/1', 3.0), ('https://a.com/2', 2.0), ('https://b.com/1', 1.0)]:
+        scheduler.put_nowait({'URL': url, 'SCORE': score})
+
+    async def run():
+        urls = []
+        for _ in range(3):
+            urlDict = await scheduler.get()
+            urls.append(urlDict['URL'])
+            scheduler.release(urlDict, 0.01, 200)
+            scheduler.task_done()
+        return urls
+    assert asyncio.run(run()) == ['https://a.com/1', 'https://b.com/1', 'https://a.com/2']
+
+def test_throttling_halves_concurrency_and_doubles_delay():
+    scheduler = HostSchedulerClass(minDelay=0.25, initialConcurrency=4)
+    state = scheduler.hostState('https://a.com/')
+    state['ACTIVE'] = 1
+    scheduler.release({'URL': 'https://a.com/'}, 0.1, 429)
+    assert state['LIMIT'] == 2.0 and state['DELAY'] == 0.5 and state['THROTTLED'] == 1
+
+def test_unused_delay_is_given_back_only_if_not_reserved_since():
+    scheduler = HostSchedulerClass(minDelay=10, initialConcurrency=2)
+    scheduler.put_nowait({'URL': 'https://a.com/1'})
+    scheduler.put_nowait({'URL': 'https://a.com/2'})
+    state = scheduler.hostState('https://a.com/')
+
+    async def run():
+        first = await scheduler.get()
+        # skipped URL: the host can be requested right away
+        scheduler.release(first, 0.0, None)
+        assert state['NEXT'] == 0.0
+        second = await scheduler.get()
+        reserved = state['NEXT']
+        third = {'URL': 'https://a.com/3'}
+        scheduler.put_nowait(third)
+        state['NEXT'] = 0.0
+        third = await scheduler.get()
+        # the delay reserved for the third URL stays when the second one is skipped
+        scheduler.release(second, 0.0, None)
+        assert state['NEXT'] > reserved
+    asyncio.run(run())
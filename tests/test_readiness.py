@@ -0,0 +1,37 @@
+import asyncio
+import time
+from readiness import ReadinessClass
+
+class FakePage:
+    # page loading instantly; quiet phases settle as given, one value per quiet phase
+    def __init__(self, settles: list):
+        self.settles = list(settles)
+        self.quietPhases = 0
+
+    async def wait_for_load_state(self, state: str, timeout: float):
+        pass
+
+    async def evaluate(self, script: str, arguments: dict):
+        self.quietPhases += 1
+        return self.settles.pop(0)
+
+def crawl(readiness: ReadinessClass, page: FakePage, pages: int):
+    async def run():
+        for _ in range(pages):
+            await readiness.waitForReady(page, 'example.com', time.monotonic())
+    asyncio.run(run())
+
+def test_single_unsettled_page_keeps_quiet_phase():
+    page = FakePage([False] + [True] * 9)
+    crawl(ReadinessClass(), page, 10)
+    assert page.quietPhases == 10
+
+def test_mostly_unsettled_domain_is_ready_at_load_but_probed():
+    readiness = ReadinessClass()
+    page = FakePage([False] * 6 + [True] * 20)
+    crawl(readiness, page, 33)
+    # 3 samples, then every 10th of the 30 skipped pages probes the quiet phase
+    assert page.quietPhases == 3 + 3
+    # settling probes bring the domain back to the quiet phase
+    crawl(readiness, page, 20)
+    assert not readiness.quietStats['example.com']['UNSETTLED'] >= readiness.UNSETTLEDSHARE
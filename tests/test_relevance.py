@@ -0,0 +1,22 @@
+from relevance import RelevanceScorerClass, tokenize
+
+def test_tokenize():
+    assert tokenize('The Annual-Reports of 2023 (PDF)') == {'annual', 'report', '2023', 'pdf'}
+    assert tokenize('class access') == {'class', 'access'}
+
+def test_keyword_links_score_higher():
+    scorer = RelevanceScorerClass('yeast oil, biofuel')
+    relevant = scorer.score('https://example.com/research/yeast-oil', 'Oil from yeast', 1)
+    partial = scorer.score('https://example.com/research/oil-prices', 'Oil prices', 1)
+    unrelated = scorer.score('https://example.com/about', 'About us', 1)
+    assert relevant > partial > unrelated
+
+def test_documents_boilerplate_and_tiers():
+    scorer = RelevanceScorerClass('biofuel')
+    assert scorer.score('https://example.com/files/report.PDF', '', 1) > scorer.score('https://example.com/files/report', '', 1)
+    assert scorer.score('https://example.com/privacy', 'Privacy policy', 1) < scorer.score('https://example.com/news', 'News', 1)
+    assert scorer.score('https://example.com/biofuel', '', 1) > scorer.score('https://example.com/biofuel', '', 3)
+
+def test_no_keywords():
+    scorer = RelevanceScorerClass('')
+    assert scorer.score('https://example.com/a', 'Anything', 0) == 0.0
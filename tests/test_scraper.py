@@ -0,0 +1,63 @@
+import asyncio
+import json
+from scraper import ScraperClass
+from politeness import HostSchedulerClass
+
+# link graph of two sites without links between them
+LINKS = {
+    'https://alpha.com/': ['https://alpha.com/a', 'https://alpha.com/b', 'https://beta.com/'],
+    'https://alpha.com/a': ['https://alpha.com/a1', 'https://alpha.com/a2', 'https://alpha.com/'],
+    'https://alpha.com/b': ['https://alpha.com/b1'],
+    'https://beta.com/': ['https://beta.com/x', 'https://beta.com/y'],
+    'https://beta.com/x': ['https://beta.com/x1', 'https://alpha.com/a'],
+}
+
+class FakeScraperClass(ScraperClass):
+    # scraper crawling LINKS without browser & network
+    async def scrapePages(self, seeds: list):
+        for seed in seeds:
+            self.enqueueURL({'URL': seed['URL'], 'TIER': 0, 'PARENT': None, 'SEED': seed['INDEX']})
+        workers = [asyncio.create_task(self.scrapeWorker(None)) for _ in range(self.WORKERS)]
+        await self.waitUntilCrawled()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def scrapePage(self, context, url: str, tier: int, parent: str, seed: dict):
+        await asyncio.sleep(0.001 * (len(url) % 5))
+        self.scrapedPages.add(url)
+        self.saveMetadata({'ID': url, 'TIMESTAMP': 0, 'TYPE': 'page', 'URL': url, 'TIER': tier, 'TITLE': url, 'PARENT': parent, 'READYTIME': 0.1})
+        self.checkLinks(LINKS.get(url, []), tier + 1, url, seed)
+        return 200
+
+# function dropping run dependent fields & ordering children by URL (siblings are saved in completion order)
+def normalize(nodes: list):
+    return sorted(({**{key: value for key, value in node.items() if key not in ('TIMESTAMP', 'READYTIME')},
+                    'CHILDREN': normalize(node.get('CHILDREN', []))} for node in nodes), key=lambda node: node['URL'])
+
+def crawl(outputDir, concurrentSeeds: bool):
+    scraper = FakeScraperClass(3, 100, 100, True, concurrentSeeds=concurrentSeeds, respectRobots=False, outputDir=outputDir)
+    scraper.scrapingQueue = HostSchedulerClass(minDelay=0)
+    asyncio.run(scraper.runScraper(['https://alpha.com/', 'https://beta.com/']))
+    return json.loads((outputDir / 'metadata.json').read_text())
+
+def test_concurrent_and_sequential_layouts_match(tmp_path):
+    # seeds don't share pages (domainLimit) & limits are not reached
+    sequential = crawl(tmp_path / 'sequential', False)
+    concurrent = crawl(tmp_path / 'concurrent', True)
+    assert [node['URL'] for node in concurrent] == ['https://alpha.com/', 'https://beta.com/']
+    assert [len(json.dumps(node).split('"URL"')) - 1 for node in concurrent] == [6, 4]
+    assert normalize(concurrent) == normalize(sequential)
+
+def test_resume_in_given_output_directory(tmp_path):
+    outputDir, statePath = tmp_path / 'output', tmp_path / 'crawl.db'
+    scraper = FakeScraperClass(3, 100, 100, True, respectRobots=False, outputDir=outputDir, statePath=statePath)
+    # interrupted run: started, one record saved, never finished
+    scraper.crawlStore.startRun(['https://alpha.com/'], outputDir)
+    (outputDir / 'metadata.jsonl').write_text(json.dumps({'ID': 'x', 'URL': 'https://alpha.com/', 'PARENT': None}) + '\n')
+    scraper.crawlStore.close()
+
+    scraper = FakeScraperClass(3, 100, 100, True, respectRobots=False, outputDir=outputDir, statePath=statePath)
+    scraper.scrapingQueue = HostSchedulerClass(minDelay=0)
+    assert asyncio.run(scraper.runScraper(['https://alpha.com/'])) == outputDir
+    assert (outputDir / 'metadata.json').exists()
@@ -0,0 +1,61 @@
+import asyncio
+import json
+import search
+from search import SearchClass
+
+class FakeBackend:
+    # backend returning fixed results per term, failing the first `failures` calls
+    def __init__(self, results: dict, failures: int = 0):
+        self.results = results
+        self.failures = failures
+        self.calls = []
+
+    def text(self, term: str, searchLimit: int):
+        self.calls.append(term)
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError('rate limited')
+        return self.results[term][:searchLimit]
+
+def test_search_retries_with_backoff(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(search.time, 'sleep', sleeps.append)
+    backend = FakeBackend({'oil': ['https://a.com/']}, failures=2)
+    client = SearchClass(backend=backend, maxRetries=3, cacheDir=tmp_path)
+    assert client.search('oil', 10) == ['https://a.com/']
+    assert len(backend.calls) == 3
+    assert len(sleeps) == 2 and 1 <= sleeps[0] < 2 and 2 <= sleeps[1] < 3
+
+def test_search_gives_up_after_retries(tmp_path, monkeypatch):
+    monkeypatch.setattr(search.time, 'sleep', lambda seconds: None)
+    backend = FakeBackend({'oil': ['https://a.com/']}, failures=10)
+    client = SearchClass(backend=backend, maxRetries=2, cacheDir=tmp_path)
+    assert client.search('oil', 10) == []
+    assert len(backend.calls) == 3
+    # failed searches are not cached
+    assert list(tmp_path.iterdir()) == []
+
+def test_search_uses_cache_until_expired(tmp_path):
+    backend = FakeBackend({'oil': ['https://a.com/']})
+    client = SearchClass(backend=backend, cacheDir=tmp_path, cacheTTL=3600)
+    assert client.search('oil', 10) == ['https://a.com/']
+    assert client.search('oil', 10) == ['https://a.com/']
+    assert backend.calls == ['oil']
+    # a different limit is a different query
+    client.search('oil', 5)
+    assert backend.calls == ['oil', 'oil']
+    # expire the cache entry
+    path = client.cachePath('oil', 10)
+    entry = json.loads(path.read_text())
+    path.write_text(json.dumps({**entry, 'TIMESTAMP': entry['TIMESTAMP'] - 3601}))
+    client.search('oil', 10)
+    assert backend.calls == ['oil', 'oil', 'oil']
+
+def test_run_search_removes_duplicates_across_terms(tmp_path):
+    backend = FakeBackend({
+        'oil': ['https://a.com/x?b=2&a=1', 'https://b.com/'],
+        'yeast': ['https://A.com/x/?a=1&b=2#top', 'https://c.com/', 'https://b.com'],
+    })
+    client = SearchClass(backend=backend, cacheDir=None)
+    results = asyncio.run(client.runSearch('oil, yeast', 10))
+    assert results == ['https://a.com/x?b=2&a=1', 'https://b.com/', 'https://c.com/']